@@ -4,41 +4,67 @@ Main CLI for the package.
 Provides subcommands for each step of the DICOM to BIDS conversion pipeline.
 """
 
-import re
+import os
 import click
 from pathlib import Path
 from typing import Optional, List
 
 from bids7t import __version__
-from bids7t.core import resolve_studydir, detect_sessions
 
 
 def _resolve_sessions(studydir: Path, subject: str, session: Optional[str]) -> List[Optional[str]]:
     if session is not None:
         return [session]
+    from bids7t.core import detect_sessions
     return detect_sessions(studydir, subject)
 
 
+def _require_exists(path: Optional[Path], param_hint: str, dir_only: bool = False) -> Optional[Path]:
+    # existence checks are done here rather than via click.Path(exists=True),
+    # so they only run once a command is actually executing
+    if path is None:
+        return None
+    if not path.exists():
+        raise click.BadParameter(f"Path '{path}' does not exist.", param_hint=param_hint)
+    if dir_only and not path.is_dir():
+        raise click.BadParameter(f"Directory '{path}' is a file.", param_hint=param_hint)
+    return path
+
+
 class HelpfulGroup(click.Group):
-    def invoke(self, ctx):
-        if not ctx.protected_args and not ctx.invoked_subcommand:
+    # bare `bids7t` prints help and exits 0 (not during shell completion,
+    # which parses with empty args). checked before parsing, since
+    # click's own no_args_is_help path exits with a usage error (code 2)
+    def parse_args(self, ctx, args):
+        if not args and not ctx.resilient_parsing:
             click.echo(ctx.get_help())
             ctx.exit(0)
-        return super().invoke(ctx)
+        return super().parse_args(ctx, args)
+
+
+# shared Option instances, built once at import and attached to every
+# subject/session command (click only reads them, so sharing is safe)
+_COMMON_OPTS = (
+    click.Option(['--studydir', '-s'], type=click.Path(file_okay=False, path_type=Path),
+                 default=None, help='Path to BIDS study directory (default: auto-detect from CWD)'),
+    click.Option(['--subject', '-sub'], type=str, required=True,
+                 help='Subject ID (without sub- prefix)'),
+    click.Option(['--session', '-ses'], type=str, required=False, default=None,
+                 help='Session ID (without ses- prefix). If omitted, auto-detects.'),
+    click.Option(['--force', '-f'], is_flag=True, default=False,
+                 help='Force overwrite existing files'),
+    click.Option(['--verbose', '-v'], is_flag=True, default=False,
+                 help='Enable verbose output'),
+)
 
 
 def common_options(f):
     """Common options for subject/session commands."""
-    f = click.option('--studydir', '-s', type=click.Path(exists=True, file_okay=False, path_type=Path),
-                     default=None, help='Path to BIDS study directory (default: auto-detect from CWD)')(f)
-    f = click.option('--subject', '-sub', type=str, required=True,
-                     help='Subject ID (without sub- prefix)')(f)
-    f = click.option('--session', '-ses', type=str, required=False, default=None,
-                     help='Session ID (without ses- prefix). If omitted, auto-detects.')(f)
-    f = click.option('--force', '-f', is_flag=True, default=False,
-                     help='Force overwrite existing files')(f)
-    f = click.option('--verbose', '-v', is_flag=True, default=False,
-                     help='Enable verbose output')(f)
+    # same effect as stacking click.option() decorators, minus re-building
+    # the Option objects for each command
+    if not hasattr(f, '__click_params__'):
+        f.__click_params__ = []
+    f.__click_params__.extend(_COMMON_OPTS)
     return f
 
 
@@ -71,12 +97,13 @@ def cli():
 # --- init ---
 
 @cli.command(context_settings=dict(help_option_names=['-h', '--help']))
-@click.option('--studydir', '-s', type=click.Path(exists=True, file_okay=False, path_type=Path),
+@click.option('--studydir', '-s', type=click.Path(file_okay=False, path_type=Path),
               default=None, help='Path to BIDS study directory (default: auto-detect from CWD)')
 @click.option('--force', '-f', is_flag=True, default=False, help='Overwrite existing BIDS top-level files')
 @click.option('--verbose', '-v', is_flag=True, default=False, help='Enable verbose output')
 def init(studydir, force, verbose):
     """Initialize BIDS study top-level files."""
+    from bids7t.core import resolve_studydir
     studydir = resolve_studydir(studydir)
     from bids7t.commands.init import run_init
     run_init(studydir=studydir, verbose=verbose, force=force)
@@ -86,14 +113,16 @@ def init(studydir, force, verbose):
 
 @cli.command(context_settings=dict(help_option_names=['-h', '--help']))
 @common_options
-@click.option('--dicom-dir', '-d', type=click.Path(exists=True, path_type=Path),
+@click.option('--dicom-dir', '-d', type=click.Path(path_type=Path),
               required=False, default=None,
               help='Path to DICOM source (default: uses dicomdir in bids7t.yaml)')
 @click.option('--zip-input', is_flag=True, default=False,
               help='Explicitly specify that input is/contains a zip file')
 def dcm2src(studydir, subject, session, force, verbose, dicom_dir, zip_input):
     """Import DICOMs to sourcedata directory."""
+    from bids7t.core import resolve_studydir
     studydir = resolve_studydir(studydir)
+    _require_exists(dicom_dir, "'--dicom-dir' / '-d'")
     from bids7t.commands.dcm2src import run_dcm2src
     run_dcm2src(studydir=studydir, subject=subject, session=session,
                 dicom_dir=dicom_dir, force=force, verbose=verbose, zip_input=zip_input)
@@ -103,7 +132,7 @@ def dcm2src(studydir, subject, session, force, verbose, dicom_dir, zip_input):
 
 @cli.command(context_settings=dict(help_option_names=['-h', '--help']))
 @common_options
-@click.option('--config', '-c', type=click.Path(exists=True, path_type=Path),
+@click.option('--config', '-c', type=click.Path(path_type=Path),
               default=None,
               help='Path to bids7t config file (default: code/bids7t.yaml). '
                    'Use for pilot sessions with different scan protocols.')
@@ -120,7 +149,9 @@ def src2rawdata(studydir, subject, session, force, verbose, config):
         src2rawdata --subject S01 --session MR1 \\
                     --config code/bids7t_ses-MR1.yaml
     """
+    from bids7t.core import resolve_studydir
     studydir = resolve_studydir(studydir)
+    _require_exists(config, "'--config' / '-c'")
     from bids7t.commands.src2rawdata import run_src2rawdata
     for ses in _resolve_sessions(studydir, subject, session):
         run_src2rawdata(studydir=studydir, subject=subject, session=ses,
@@ -133,6 +164,7 @@ def src2rawdata(studydir, subject, session, force, verbose, config):
 @common_options
 def fixanat(studydir, subject, session, force, verbose):
     """Fix anatomical files (MP2RAGE processing)."""
+    from bids7t.core import resolve_studydir
     studydir = resolve_studydir(studydir)
     from bids7t.commands.fixanat import run_fixanat
     for ses in _resolve_sessions(studydir, subject, session):
@@ -145,6 +177,7 @@ def fixanat(studydir, subject, session, force, verbose):
 @common_options
 def fixfmap(studydir, subject, session, force, verbose):
     """Fix fieldmap files (B0/B1/GRE naming, Units)."""
+    from bids7t.core import resolve_studydir
     studydir = resolve_studydir(studydir)
     from bids7t.commands.fixfmap import run_fixfmap
     for ses in _resolve_sessions(studydir, subject, session):
@@ -159,6 +192,7 @@ def fixfmap(studydir, subject, session, force, verbose):
               help='Phase encoding direction for AP scans (default: j-)')
 def fixepi(studydir, subject, session, force, verbose, ap_phase_enc):
     """Fix EPI JSON metadata (PhaseEncodingDirection, TotalReadoutTime)."""
+    from bids7t.core import resolve_studydir
     studydir = resolve_studydir(studydir)
     from bids7t.commands.fixepi import run_fixepi
     for ses in _resolve_sessions(studydir, subject, session):
@@ -173,13 +207,18 @@ def fixepi(studydir, subject, session, force, verbose, ap_phase_enc):
 @click.option('--orientation', type=str, default='LPI', help='Target orientation (default: LPI)')
 @click.option('--modality', type=click.Choice(['all', 'anat', 'func', 'fmap', 'dwi']),
               default='all', help='Which modality to process')
-def reorient(studydir, subject, session, force, verbose, orientation, modality):
+@click.option('--fsl', 'use_fsl', is_flag=True, default=False, help='Use FSL fslswapdim instead of nibabel')
+@click.option('--jobs', '-j', type=click.IntRange(min=1), default=None,
+              help='Files reoriented in parallel (default: 4, capped at CPU count)')
+def reorient(studydir, subject, session, force, verbose, orientation, modality, use_fsl, jobs):
     """Reorient images to standard orientation."""
+    from bids7t.core import resolve_studydir
     studydir = resolve_studydir(studydir)
     from bids7t.commands.reorient import run_reorient
     for ses in _resolve_sessions(studydir, subject, session):
         run_reorient(studydir=studydir, subject=subject, session=ses,
-                     orientation=orientation, modality=modality, force=force, verbose=verbose)
+                     orientation=orientation, modality=modality, force=force, verbose=verbose,
+                     use_fsl=use_fsl, jobs=jobs)
 
 
 # --- slicetime ---
@@ -188,13 +227,17 @@ def reorient(studydir, subject, session, force, verbose, orientation, modality):
 @common_options
 @click.option('--slice-order', type=click.Choice(['up', 'down', 'odd', 'even']), default='down')
 @click.option('--slice-direction', type=int, default=3)
-def slicetime(studydir, subject, session, force, verbose, slice_order, slice_direction):
+@click.option('--jobs', '-j', type=click.IntRange(min=1), default=None,
+              help='BOLD runs corrected in parallel (default: 4, capped at CPU count)')
+def slicetime(studydir, subject, session, force, verbose, slice_order, slice_direction, jobs):
     """Slice timing correction using FSL slicetimer."""
+    from bids7t.core import resolve_studydir
     studydir = resolve_studydir(studydir)
     from bids7t.commands.slicetime import run_slicetime
     for ses in _resolve_sessions(studydir, subject, session):
         run_slicetime(studydir=studydir, subject=subject, session=ses,
-                      slice_order=slice_order, slice_direction=slice_direction, force=force, verbose=verbose)
+                      slice_order=slice_order, slice_direction=slice_direction, force=force, verbose=verbose,
+                      jobs=jobs)
 
 
 # --- validate ---
@@ -203,6 +246,7 @@ def slicetime(studydir, subject, session, force, verbose, slice_order, slice_dir
 @common_options
 def validate(studydir, subject, session, force, verbose):
     """Run BIDS validator (Docker)."""
+    from bids7t.core import resolve_studydir
     studydir = resolve_studydir(studydir)
     from bids7t.commands.validate import run_validate
     for ses in _resolve_sessions(studydir, subject, session):
@@ -218,6 +262,7 @@ def validate(studydir, subject, session, force, verbose):
 @click.option('--modalities', '-mod', type=str, multiple=True, default=None)
 def qc(studydir, subject, session, force, verbose, mem_gb, n_procs, modalities):
     """Run MRIQC quality control (Docker)."""
+    from bids7t.core import resolve_studydir
     studydir = resolve_studydir(studydir)
     from bids7t.commands.qc import run_qc
     for ses in _resolve_sessions(studydir, subject, session):
@@ -230,10 +275,10 @@ def qc(studydir, subject, session, force, verbose, mem_gb, n_procs, modalities):
 
 @cli.command('run-all', context_settings=dict(help_option_names=['-h', '--help']))
 @common_options
-@click.option('--dicom-dir', '-d', type=click.Path(exists=True, file_okay=False, path_type=Path),
+@click.option('--dicom-dir', '-d', type=click.Path(path_type=Path),
               required=False, default=None,
               help='Path to source DICOM directory (default: uses dicomdir in config)')
-@click.option('--config', '-c', type=click.Path(exists=True, path_type=Path),
+@click.option('--config', '-c', type=click.Path(path_type=Path),
               default=None,
               help='Path to bids7t config file (default: code/bids7t.yaml). '
                    'Use for pilot sessions with different scan protocols.')
@@ -253,7 +298,10 @@ def run_all(studydir, subject, session, force, verbose, dicom_dir, config,
     
     If --session is omitted, auto-detects sessions and processes all.
     """
+    from bids7t.core import resolve_studydir
     studydir = resolve_studydir(studydir)
+    _require_exists(dicom_dir, "'--dicom-dir' / '-d'", dir_only=True)
+    _require_exists(config, "'--config' / '-c'")
     from bids7t.commands.run_all import run_all_steps
     for ses in _resolve_sessions(studydir, subject, session):
         run_all_steps(studydir=studydir, subject=subject, session=ses,
@@ -265,18 +313,18 @@ def run_all(studydir, subject, session, force, verbose, dicom_dir, config,
 # --- status ---
 
 @cli.command(context_settings=dict(help_option_names=['-h', '--help']))
-@click.option('--studydir', '-s', type=click.Path(exists=True, file_okay=False, path_type=Path),
+@click.option('--studydir', '-s', type=click.Path(file_okay=False, path_type=Path),
               default=None, help='Path to BIDS study directory')
 @click.option('--verbose', '-v', is_flag=True, default=False)
 def status(studydir, verbose):
     """Show study status."""
     from bids7t.core import find_config_from_cwd, find_studydir_from_cwd, load_study_config
     
+    _require_exists(studydir, "'--studydir' / '-s'", dir_only=True)
     click.echo("bids7t status")
     click.echo("=" * 60)
     
     if studydir is not None:
-        studydir = Path(studydir)
         config_path = studydir / "code" / "bids7t.yaml"
     else:
         config_path = find_config_from_cwd()
@@ -301,11 +349,14 @@ def status(studydir, verbose):
         click.echo("DICOM dir:  not configured")
     click.echo("")
     
+    # two directory listings answer all checks instead of one stat per path
+    root_entries = _entry_names(studydir)
+    code_entries = _entry_names(studydir / "code") if "code" in root_entries else set()
     checks = [
-        ("code/bids7t.yaml", config_path.exists()),
-        ("code/mp2rage.yaml", (studydir / "code" / "mp2rage.yaml").exists()),
-        ("rawdata/", (studydir / "rawdata").exists()),
-        ("sourcedata/", (studydir / "sourcedata").exists()),
+        ("code/bids7t.yaml", "bids7t.yaml" in code_entries),
+        ("code/mp2rage.yaml", "mp2rage.yaml" in code_entries),
+        ("rawdata/", "rawdata" in root_entries),
+        ("sourcedata/", "sourcedata" in root_entries),
     ]
     click.echo("Study directory structure:")
     for name, exists in checks:
@@ -323,16 +374,17 @@ def status(studydir, verbose):
             click.echo(f"  series: {len(series)} mapping rules")
     
     rawdata = studydir / "rawdata"
-    if rawdata.exists():
+    if "rawdata" in root_entries:
         subjects = {}
-        for sub_dir in sorted(rawdata.iterdir()):
-            if not sub_dir.is_dir() or not sub_dir.name.startswith("sub-"):
+        for sub_name, sub_path in _subdirs(rawdata):
+            if not sub_name.startswith("sub-"):
                 continue
-            sub_id = sub_dir.name[4:]
-            ses_dirs = sorted([d for d in sub_dir.iterdir() if d.is_dir() and d.name.startswith("ses-")])
-            if ses_dirs:
-                subjects[sub_id] = [d.name[4:] for d in ses_dirs]
-            elif any(d.is_dir() and d.name in ("anat", "func", "fmap", "dwi") for d in sub_dir.iterdir()):
+            sub_id = sub_name[4:]
+            children = [name for name, _ in _subdirs(sub_path)]
+            ses_names = [name for name in children if name.startswith("ses-")]
+            if ses_names:
+                subjects[sub_id] = [name[4:] for name in ses_names]
+            elif any(name in ("anat", "func", "fmap", "dwi") for name in children):
                 subjects[sub_id] = [None]
         if subjects:
             click.echo("")
@@ -342,6 +394,21 @@ def status(studydir, verbose):
                 click.echo(f"  sub-{sub_id:<20s} {ses_str}")
 
 
+def _entry_names(path: Path) -> set:
+    # names in a directory, empty if it cannot be listed
+    try:
+        with os.scandir(path) as it:
+            return {e.name for e in it}
+    except OSError:
+        return set()
+
+
+def _subdirs(path: Path) -> List[tuple]:
+    # sorted (name, path) pairs of subdirectories, one scandir pass
+    with os.scandir(path) as it:
+        return sorted((e.name, e.path) for e in it if e.is_dir())
+
+
 def main():
     cli()
 
@@ -1,19 +1,41 @@
 # command modules for bids7t CLI
+#
+# run_* functions are loaded on first access (PEP 562), so importing one
+# command module does not pull in every other command and its dependencies
 
-from .init import run_init
-from .dcm2src import run_dcm2src
-from .src2rawdata import run_src2rawdata
-from .fixanat import run_fixanat
-from .fixfmap import run_fixfmap
-from .fixepi import run_fixepi
-from .reorient import run_reorient
-from .slicetime import run_slicetime
-from .validate import run_validate
-from .qc import run_qc
-from .run_all import run_all_steps
+import importlib
+
+_LAZY = {
+    "run_init": "init",
+    "run_dcm2src": "dcm2src",
+    "run_src2rawdata": "src2rawdata",
+    "run_fixanat": "fixanat",
+    "run_fixfmap": "fixfmap",
+    "run_fixepi": "fixepi",
+    "run_reorient": "reorient",
+    "run_slicetime": "slicetime",
+    "run_validate": "validate",
+    "run_qc": "qc",
+    "run_all_steps": "run_all",
+    "run_all_many": "run_all",
+}
 
 __all__ = [
     "run_init", "run_dcm2src", "run_src2rawdata", "run_fixanat", "run_fixfmap",
     "run_fixepi", "run_reorient", "run_slicetime", "run_validate",
-    "run_qc", "run_all_steps",
-]
\ No newline at end of file
+    "run_qc", "run_all_steps", "run_all_many",
+]
+
+
+def __getattr__(name):
+    try:
+        module = _LAZY[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -5,10 +5,19 @@ import re
 import shutil
 import os
 import subprocess
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from typing import List, Optional, Tuple
 
-from bids7t.core import Session, setup_logging, run_command, check_outputs_exist
+from bids7t.core import Session, setup_logging, run_command, check_outputs_exist, is_nonempty_dir
+
+_COPY_BUFSIZE = 64 * 1024
+# zip names tried by _find_zip_file, in priority order
+_ZIP_PATTERNS_SESSION = ("{s}_ses-{ss}.zip", "{s}_{ss}.zip", "sub-{s}_ses-{ss}.zip")
+_ZIP_PATTERNS_NO_SESSION = ("{s}.zip", "sub-{s}.zip")
+# below this many entries per worker, extract in a single process
+_PARALLEL_MIN_MEMBERS = 500
 
 
 def run_dcm2src(
@@ -51,14 +60,15 @@ def run_dcm2src(
     logger.info(f"Target: {sess.paths['sourcedata']}")
     
     sourcedata_dir = sess.paths["sourcedata"]
-    if sourcedata_dir.exists() and any(sourcedata_dir.iterdir()):
-        existing_files = list(sourcedata_dir.rglob("*.dcm"))
-        should_run, _ = check_outputs_exist(existing_files[:1], logger, force)
+    if is_nonempty_dir(sourcedata_dir):
+        # one hit is enough to decide; the full list is only built when skipping
+        first = next(_iter_dcm_files(sourcedata_dir), None)
+        should_run, _ = check_outputs_exist([Path(first)] if first else [], logger, force)
         if not should_run:
-            return existing_files
+            return [Path(p) for p in _iter_dcm_files(sourcedata_dir)]
         if force:
             logger.info(f"Removing existing sourcedata: {sourcedata_dir}")
-            shutil.rmtree(sourcedata_dir)
+            _fast_rmtree(sourcedata_dir)
     
     sess.ensure_directories("sourcedata", "logs")
     
@@ -83,11 +93,25 @@ def run_dcm2src(
         if temp_dir and temp_dir.exists():
             if len(created_files) > 0:
                 logger.info(f"Cleaning up temp directory: {temp_dir}")
-                shutil.rmtree(temp_dir, ignore_errors=True)
+                _fast_rmtree(temp_dir, ignore_errors=True)
             else:
                 logger.warning(f"Keeping temp directory because conversion produced 0 DICOMs: {temp_dir}")
 
 
+def _fast_rmtree(path: Path, ignore_errors: bool = False) -> None:
+    # extracted DICOM trees hold tens of thousands of files; native rm -rf is
+    # much faster than shutil.rmtree there. falls back when rm is unavailable
+    if os.name == "posix":
+        try:
+            result = subprocess.run(["rm", "-rf", "--", str(path)],
+                                    stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            if result.returncode == 0:
+                return
+        except FileNotFoundError:
+            pass
+    shutil.rmtree(path, ignore_errors=ignore_errors)
+
+
 def _resolve_dicomdir_from_config(studydir: Path, logger) -> Path:
     """Read dicomdir from bids7t.yaml when --dicom-dir is not provided."""
     from bids7t.core import load_config
@@ -149,12 +173,12 @@ def _import_single_zip(zip_path: Path, sess: Session, force: bool, logger) -> Li
     # extracts a single zip file into the session's sourcedata directory
     sourcedata_dir = sess.paths["sourcedata"]
     
-    if sourcedata_dir.exists() and any(sourcedata_dir.iterdir()):
+    if is_nonempty_dir(sourcedata_dir):
         if not force:
-            existing = list(sourcedata_dir.rglob("*.dcm"))
+            existing = [Path(p) for p in _iter_dcm_files(sourcedata_dir)]
             logger.info(f"Sourcedata folder exists for ses-{sess.session} ({len(existing)} files), skipping")
             return existing
-        shutil.rmtree(sourcedata_dir)
+        _fast_rmtree(sourcedata_dir)
     
     sourcedata_dir.mkdir(parents=True, exist_ok=True)
     
@@ -168,7 +192,7 @@ def _import_single_zip(zip_path: Path, sess: Session, force: bool, logger) -> Li
     finally:
         if temp_dir.exists():
             if len(created_files) > 0:
-                shutil.rmtree(temp_dir, ignore_errors=True)
+                _fast_rmtree(temp_dir, ignore_errors=True)
             else:
                 logger.warning(f"Keeping temp directory because conversion produced 0 DICOMs: {temp_dir}")
 
@@ -188,19 +212,19 @@ def _resolve_input(dicom_dir, subject, session, zip_input, logger):
         raise FileNotFoundError(f"No matching zip found for {subject}{session_label} in {dicom_dir}")
     
     if dicom_dir.is_dir():
-        zip_file = _find_zip_file(dicom_dir, subject, session, logger)
-        if zip_file:
-            logger.info(f"Found matching zip file: {zip_file.name}")
-            return zip_file, None, None
+        has_zip, kind = _probe_dir(dicom_dir)
+        if has_zip:
+            zip_file = _find_zip_file(dicom_dir, subject, session, logger)
+            if zip_file:
+                logger.info(f"Found matching zip file: {zip_file.name}")
+                return zip_file, None, None
         
-        dcm_files = list(dicom_dir.rglob("*.dcm")) + list(dicom_dir.rglob("*.DCM"))
-        if dcm_files:
-            logger.info(f"Input is a DICOM directory with {len(dcm_files)} files")
+        if kind == "dcm":
+            logger.info("Input is a DICOM directory")
             return None, dicom_dir, None
         
-        subdirs = [d for d in dicom_dir.iterdir() if d.is_dir()]
-        if subdirs:
-            logger.info(f"Input directory has {len(subdirs)} subdirectories, assuming DICOM source")
+        if kind == "subdirs":
+            logger.info("Input directory has subdirectories, assuming DICOM source")
             return None, dicom_dir, None
         
         raise FileNotFoundError(f"No zip file or DICOM files found in {dicom_dir}")
@@ -208,34 +232,66 @@ def _resolve_input(dicom_dir, subject, session, zip_input, logger):
     raise FileNotFoundError(f"Input path does not exist: {dicom_dir}")
 
 
+def _probe_dir(directory, max_depth=2):
+    # classify a DICOM input dir without walking the whole tree.
+    # returns (has_zip, kind): has_zip is whether any *.zip sits at the top
+    # level; kind is "dcm" if a .dcm file is found within max_depth levels,
+    # "subdirs" if there are subdirectories but no .dcm that shallow, else None
+    has_zip = has_dcm = False
+    subdirs = []
+    with os.scandir(directory) as it:
+        for entry in it:
+            name = entry.name.lower()
+            if entry.is_dir(follow_symlinks=False):
+                subdirs.append(entry.path)
+            elif name.endswith(".zip"):
+                has_zip = True
+            elif name.endswith(".dcm"):
+                has_dcm = True
+    if has_dcm:
+        return has_zip, "dcm"
+    
+    # descend a bounded number of levels, stopping at the first .dcm
+    stack = [(d, 1) for d in subdirs]
+    while stack:
+        path, depth = stack.pop()
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        if depth + 1 < max_depth:
+                            stack.append((entry.path, depth + 1))
+                    elif entry.name.lower().endswith(".dcm"):
+                        return has_zip, "dcm"
+        except OSError:
+            continue
+    return has_zip, ("subdirs" if subdirs else None)
+
+
 def _find_zip_file(directory, subject, session, logger):
-    patterns = []
-    if session:
-        patterns.extend([
-            f"{subject}_ses-{session}.zip", f"{subject}_{session}.zip",
-            f"sub-{subject}_ses-{session}.zip",
-        ])
-    else:
-        patterns.extend([f"{subject}.zip", f"sub-{subject}.zip"])
+    templates = _ZIP_PATTERNS_SESSION if session else _ZIP_PATTERNS_NO_SESSION
+    patterns = [t.format(s=subject, ss=session) for t in templates]
     
-    all_zips = list(directory.glob("*.zip"))
+    # one listing, lowercased once, serves all three passes
+    zips = {z.name: z for z in directory.glob("*.zip")}
     
     for pattern in patterns:
-        if (directory / pattern).exists():
-            return directory / pattern
+        if pattern in zips:
+            return zips[pattern]
     
-    for zip_file in all_zips:
-        name_lower = zip_file.name.lower()
-        for pattern in patterns:
-            if name_lower == pattern.lower():
-                return zip_file
+    patterns_lower = {p.lower() for p in patterns}
+    zips_lower = [(z, name.lower()) for name, z in zips.items()]
     
-    for zip_file in all_zips:
-        name_lower = zip_file.name.lower()
-        if subject.lower() in name_lower:
-            if session is None or session.lower() in name_lower:
-                logger.info(f"Found zip by partial match: {zip_file.name}")
-                return zip_file
+    for zip_file, name_lower in zips_lower:
+        if name_lower in patterns_lower:
+            return zip_file
+    
+    subject_lower = subject.lower()
+    session_lower = session.lower() if session else ""
+    for zip_file, name_lower in zips_lower:
+        if subject_lower in name_lower and session_lower in name_lower:
+            logger.info(f"Found zip by partial match: {zip_file.name}")
+            return zip_file
     return None
 
 
@@ -247,19 +303,12 @@ def _extract_zip(zip_path, target_dir, logger):
         raise FileNotFoundError(f"Zip file not found: {zip_path}")
 
     if target_dir.exists():
-        shutil.rmtree(target_dir)
+        _fast_rmtree(target_dir)
 
     target_dir.mkdir(parents=True, exist_ok=True)
 
     logger.info(f"Extracting {zip_path.name} to {target_dir}")
-    cmd = ["unzip", "-q", str(zip_path), "-d", str(target_dir)]
-    result = subprocess.run(cmd, capture_output=True, text=True)
-
-    if result.returncode not in (0, 1, 81):
-        stderr = (result.stderr or "").lower()
-        if "password" in stderr:
-            raise RuntimeError(f"Zip file appears to be encrypted: {zip_path}")
-        raise RuntimeError(f"Failed to extract {zip_path}: {result.stderr}")
+    _unzip(zip_path, target_dir, logger)
 
     # if it contains another zip (for example export.zip), unpack that too and search.
     # some imported dicomdirs have multiple levels of zips for some reason 
@@ -268,44 +317,133 @@ def _extract_zip(zip_path, target_dir, logger):
         nested_dir = nested_zip.with_suffix("")  # export.zip -> export
         logger.info(f"Found nested zip: {nested_zip.name}, extracting it")
         nested_dir.mkdir(parents=True, exist_ok=True)
+        _unzip(nested_zip, nested_dir, logger, nested=True)
 
-        nested_cmd = ["unzip", "-q", str(nested_zip), "-d", str(nested_dir)]
-        nested_result = subprocess.run(nested_cmd, capture_output=True, text=True)
+    return _find_dicom_root(target_dir, logger)
 
-        if nested_result.returncode not in (0, 1, 81):
-            stderr = (nested_result.stderr or "").lower()
-            if "password" in stderr:
-                raise RuntimeError(f"Nested zip file appears to be encrypted: {nested_zip}")
-            raise RuntimeError(f"Failed to extract nested zip {nested_zip}: {nested_result.stderr}")
 
-    return _find_dicom_root(target_dir, logger)
+def _unzip(zip_path: Path, target_dir: Path, logger, nested: bool = False) -> None:
+    # extract in-process with zipfile, streaming each member to disk. falls
+    # back to the unzip binary for archives zipfile can't handle (encryption,
+    # unsupported compression, damaged entries that unzip tolerates)
+    try:
+        with zipfile.ZipFile(zip_path) as zf:
+            members = zf.infolist()
+            n_workers = min(os.cpu_count() or 1, len(members) // _PARALLEL_MIN_MEMBERS)
+            if n_workers < 2:
+                skipped = _extract_members(zf, members, target_dir)
+        if n_workers >= 2:
+            skipped = _extract_parallel(zip_path, members, target_dir, n_workers)
+        for name in skipped:
+            logger.warning(f"Skipping zip entry outside target directory: {name}")
+        return
+    except (zipfile.BadZipFile, NotImplementedError, RuntimeError) as e:
+        logger.debug(f"zipfile could not extract {zip_path.name} ({e}), falling back to unzip")
+
+    label = "Nested zip file" if nested else "Zip file"
+    cmd = ["unzip", "-q", "-o", str(zip_path), "-d", str(target_dir)]
+    result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    if result.returncode not in (0, 1, 81):
+        stderr = result.stderr[-4096:].decode(errors="replace")
+        if "password" in stderr.lower():
+            raise RuntimeError(f"{label} appears to be encrypted: {zip_path}")
+        prefix = "Failed to extract nested zip" if nested else "Failed to extract"
+        raise RuntimeError(f"{prefix} {zip_path}: {stderr}")
+
+
+def _extract_members(zf: zipfile.ZipFile, members, target_dir: Path) -> List[str]:
+    # writes the given members under target_dir; returns unsafe entries skipped
+    root = os.path.realpath(target_dir)
+    skipped = []
+    for info in members:
+        dest = os.path.realpath(os.path.join(root, info.filename))
+        if dest != root and not dest.startswith(root + os.sep):
+            skipped.append(info.filename)
+            continue
+        if info.is_dir():
+            os.makedirs(dest, exist_ok=True)
+            continue
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        with zf.open(info) as src, open(dest, "wb") as dst:
+            shutil.copyfileobj(src, dst, _COPY_BUFSIZE)
+    return skipped
+
+
+def _extract_chunk(zip_path: str, names: List[str], target_dir: str) -> List[str]:
+    # worker: ZipFile handles can't be shared across processes, reopen by path
+    with zipfile.ZipFile(zip_path) as zf:
+        return _extract_members(zf, [zf.getinfo(n) for n in names], Path(target_dir))
+
+
+def _extract_parallel(zip_path: Path, members, target_dir: Path, n_workers: int) -> List[str]:
+    # DEFLATE is CPU-bound and each member decompresses independently, so
+    # large exports (tens of thousands of DICOMs) are split across processes
+    names = [info.filename for info in members]
+    chunks = [names[i::n_workers] for i in range(n_workers)]
+    skipped = []
+    with ProcessPoolExecutor(max_workers=n_workers) as pool:
+        futures = [pool.submit(_extract_chunk, str(zip_path), chunk, str(target_dir))
+                   for chunk in chunks]
+        for future in futures:
+            skipped.extend(future.result())
+    return skipped
+
+
+def _walk_entries(root):
+    # iterative scandir walk yielding DirEntry objects for everything under
+    # root. DirEntry caches the file type, so no extra stat per entry
+    stack = [os.fspath(root)]
+    while stack:
+        try:
+            it = os.scandir(stack.pop())
+        except OSError:
+            continue
+        with it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                yield entry
+
+
+def _iter_dcm_files(root):
+    # paths (str) of all *.dcm / *.DCM files under root, in one pass
+    for entry in _walk_entries(root):
+        if entry.name.lower().endswith(".dcm") and entry.is_file(follow_symlinks=False):
+            yield entry.path
 
 
 def _find_dicom_root(extracted_dir, logger):
 
     extracted_dir = Path(extracted_dir)
 
-    dicom_files = list(extracted_dir.rglob("*.dcm")) + list(extracted_dir.rglob("*.DCM"))
+    # one walk collects both the DICOM files and any dirs named "DICOM"
+    dicom_files, dicom_dirs = [], []
+    for entry in _walk_entries(extracted_dir):
+        name = entry.name.lower()
+        if entry.is_dir(follow_symlinks=False):
+            if name == "dicom":
+                dicom_dirs.append(entry.path)
+        elif name.endswith(".dcm") and entry.is_file(follow_symlinks=False):
+            dicom_files.append(entry.path)
 
     if not dicom_files:
         logger.warning(f"No .dcm files found under {extracted_dir}; using root")
         return extracted_dir
 
-    # first candidate is a dir literally named "DICOM"
-    dicom_dirs = [p for p in extracted_dir.rglob("*") if p.is_dir() and p.name.lower() == "dicom"]
-
-    def count_dicom_files(root: Path) -> int:
-        return sum(1 for _ in root.rglob("*.dcm")) + sum(1 for _ in root.rglob("*.DCM"))
+    def count_dicom_files(root: str) -> int:
+        prefix = root + os.sep
+        return sum(1 for f in dicom_files if f.startswith(prefix))
 
+    # first candidate is a dir literally named "DICOM"
     if dicom_dirs:
         
-        chosen = max(dicom_dirs, key=count_dicom_files)
+        chosen = max(sorted(dicom_dirs), key=count_dicom_files)
         n = count_dicom_files(chosen)
         logger.info(f"Using DICOM directory: {chosen} ({n} DICOM files found beneath it)")
-        return chosen
+        return Path(chosen)
 
     # as a fallback: use the common parent of all DICOM file parents
-    parents = [str(f.parent) for f in dicom_files]
+    parents = [os.path.dirname(f) for f in dicom_files]
     common_parent = Path(os.path.commonpath(parents))
 
     logger.info(
@@ -327,6 +465,7 @@ def _convert_to_sourcedata(sess, dicom_dir, logger):
     ]
     run_command(cmd, logger, log_file)
     
-    created_files = list(sourcedata.rglob("*.dcm"))
+    # one scandir walk (matches .dcm/.DCM) instead of an rglob per pattern
+    created_files = [Path(p) for p in _iter_dcm_files(sourcedata)]
     logger.info(f"Organized {len(created_files)} DICOMs into sourcedata")
     return created_files
\ No newline at end of file
@@ -9,15 +9,21 @@ All operations discover files by BIDS suffix and preserve user-specified
 entities from bids7t.yaml.
 """
 
+import os
 import re
+import gzip
 import json
+import shutil
+from functools import partial
 from pathlib import Path
-from typing import List, Set, Optional, Dict, Any, Tuple
+from typing import Iterator, List, Set, Optional, Dict, Any, Tuple
 
 import numpy as np
 import nibabel as nib
 
-from bids7t.core import Session, setup_logging, check_outputs_exist
+from bids7t.core import (
+    Session, setup_logging, check_outputs_exist, save_nifti, json_sidecar, run_parallel,
+)
 from bids7t.core.session import load_mp2rage_params
 from bids7t.core.bids_naming import (
     parse_bids_name,
@@ -28,6 +34,9 @@ from bids7t.core.bids_naming import (
     BIDS_ENTITY_ORDER,
 )
 
+# legacy dcm2niix MP2RAGE1/2/3 suffixes (see _normalize_mp2rage_names)
+_MP2RAGE_NUM_RE = re.compile(r'^MP2RAGE(\d)$')
+
 
 def run_fixanat(studydir: Path, subject: str, session: Optional[str] = None,
                 force: bool = False, verbose: bool = False) -> None:
@@ -45,46 +54,64 @@ def run_fixanat(studydir: Path, subject: str, session: Optional[str] = None,
 
     mp2rage_params = load_mp2rage_params(studydir)
 
-    # normalize legacy MP2RAGE1/2/3 naming
-    _normalize_mp2rage_names(anat_dir, sess, logger)
+    # scans.tsv is read once and written once for the whole command
+    with sess.scans_tsv_batch():
+        # normalize legacy MP2RAGE1/2/3 naming
+        _normalize_mp2rage_names(anat_dir, sess, logger)
+
+        # list anat/ once for discovery. runs only add files for their own run
+        # and combined inputs are removed after the loop, so this stays valid
+        anat_names = _list_names(anat_dir)
+
+        # find all runs that have MP2RAGE data
+        run_numbers = _find_run_numbers(anat_dir, sess, anat_names)
+
+        if not run_numbers:
+            all_mp2rage = sess.find_by_suffix("anat", "MP2RAGE")
+            if not all_mp2rage:
+                logger.info("No MP2RAGE files found, skipping")
+            return
+
+        logger.info(f"Found anatomical runs: {sorted(run_numbers)}")
+
+        # runs touch disjoint files; scans.tsv updates are serialized by Session
+        runs = sorted(run_numbers)
+        run_parallel(partial(_process_run, anat_dir, sess, logger,
+                             anat_names=anat_names, mp2rage_params=mp2rage_params,
+                             force=force), runs)
+
+        # remove combined originals and temp files
+        final_names = _list_names(anat_dir)
+        _remove_combined_files(anat_dir, sess, logger, final_names)
+        _remove_temp_files(anat_dir, sess, logger, final_names)
+        sess.sync_scans_tsv(remove_missing=True, add_new=False)
+    logger.info("Anatomical fixes complete")
 
-    # find all runs that have MP2RAGE data
-    run_numbers = _find_run_numbers(anat_dir, sess)
 
-    if not run_numbers:
-        all_mp2rage = sess.find_by_suffix("anat", "MP2RAGE")
-        if not all_mp2rage:
-            logger.info("No MP2RAGE files found, skipping")
+def _process_run(anat_dir: Path, sess: Session, logger, run: int,
+                 anat_names: Set[str], mp2rage_params: Optional[Dict],
+                 force: bool) -> None:
+    """Split, compute mag/phase, reshape and inject metadata for one run."""
+    # only names present in the listing can exist; skip stat'ing the rest
+    expected = _get_expected_outputs(anat_dir, sess, run, anat_names)
+    present = (p for p in expected if p.name in anat_names)
+    should_run, _ = check_outputs_exist(present, logger, force)
+    if not should_run:
         return
+    logger.info(f"Processing run-{run}")
 
-    logger.info(f"Found anatomical runs: {sorted(run_numbers)}")
-
-    for run in sorted(run_numbers):
-        expected = _get_expected_outputs(anat_dir, sess, run)
-        if expected:
-            should_run, _ = check_outputs_exist(expected, logger, force)
-            if not should_run:
-                continue
-        logger.info(f"Processing run-{run}")
+    # split combined inv-1and2 files; real/imag halves stay in memory
+    temps = _split_inv_files(anat_dir, sess, logger, run)
 
-        # split combined inv-1and2 files
-        _split_inv_files(anat_dir, sess, logger, run)
+    # compute magnitude/phase from real+imag pairs
+    _compute_mag_phase(anat_dir, sess, logger, run, temps)
 
-        # compute magnitude/phase from real+imag pairs
-        _compute_mag_phase(anat_dir, sess, logger, run)
+    # reshape UNIT1 (T1w) if it has dummy dimensions
+    _reshape_unit1(anat_dir, sess, logger, run)
 
-        # reshape UNIT1 (T1w) if it has dummy dimensions
-        _reshape_unit1(anat_dir, sess, logger, run)
-
-        # inject MP2RAGE-specific BIDS metadata
-        if mp2rage_params:
-            _inject_mp2rage_metadata(anat_dir, sess, logger, mp2rage_params, run)
-
-    # remove combined originals and temp files
-    _remove_combined_files(anat_dir, sess, logger)
-    _remove_temp_files(anat_dir, sess, logger)
-    sess.sync_scans_tsv(remove_missing=True, add_new=False)
-    logger.info("Anatomical fixes complete")
+    # inject MP2RAGE-specific BIDS metadata
+    if mp2rage_params:
+        _inject_mp2rage_metadata(anat_dir, sess, logger, mp2rage_params, run)
 
 
 # ============================================================
@@ -132,13 +159,33 @@ def _make_temp_name(source_name: str, inv: int, part_label: str,
     return '_'.join(parts) + ext
 
 
+def _read_sidecar(json_path: Path) -> Dict[str, Any]:
+    """Read a JSON sidecar as bytes; missing or unreadable files give ``{}``."""
+    try:
+        return json.loads(json_path.read_bytes())
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_sidecar(json_path: Path, meta: Dict[str, Any]) -> None:
+    """Write a JSON sidecar in one binary write."""
+    json_path.write_bytes(json.dumps(meta, indent=2).encode())
+
+
 # ============================================================
 # Discovery helpers
 # ============================================================
 
-def _find_run_numbers(anat_dir: Path, sess: Session) -> Set[int]:
+def _list_names(directory: Path) -> Set[str]:
+    """File names in a directory, read with a single scandir."""
+    with os.scandir(directory) as it:
+        return {e.name for e in it}
+
+
+def _find_run_numbers(anat_dir: Path, sess: Session,
+                      anat_names: Optional[Set[str]] = None) -> Set[int]:
     """Find all run numbers that have MP2RAGE data."""
-    all_mp2rage = sess.find_by_suffix("anat", "MP2RAGE")
+    all_mp2rage = sess.find_by_suffix("anat", "MP2RAGE", listing=anat_names)
     runs = set()
     for f in all_mp2rage:
         parsed = parse_bids_name(f.name)
@@ -151,26 +198,26 @@ def _find_run_numbers(anat_dir: Path, sess: Session) -> Set[int]:
     return runs
 
 
-def _get_expected_outputs(anat_dir: Path, sess: Session, run: int) -> List[Path]:
+def _get_expected_outputs(anat_dir: Path, sess: Session, run: int,
+                          anat_names: Optional[Set[str]] = None) -> Iterator[Path]:
     """
-    Build expected output paths from existing inv-1and2 files.
+    Yield expected output paths derived from existing inv-1and2 files.
 
     Derives the expected output names from the actual source files,
-    preserving user entities.
+    preserving user entities. Lazy, so consumers that stop early skip
+    deriving the remaining names.
     """
     inv_files = sess.find_by_suffix("anat", "MP2RAGE",
-                                    {"inv": "1and2", "run": str(run)})
+                                    {"inv": "1and2", "run": str(run)},
+                                    listing=anat_names)
     if not inv_files:
-        return []
+        return
 
     # use the first file as a template for name derivation
     template = inv_files[0].name
-    expected = []
     for inv in [1, 2]:
         for part in ["mag", "phase"]:
-            name = derive_bids_name(template, inv=str(inv), part=part)
-            expected.append(anat_dir / name)
-    return expected
+            yield anat_dir / derive_bids_name(template, inv=str(inv), part=part)
 
 
 # ============================================================
@@ -189,16 +236,14 @@ def _normalize_mp2rage_names(anat_dir: Path, sess: Session, logger) -> None:
 
     User entities from the source filename are preserved.
     """
-    mp2rage_num_re = re.compile(r'^MP2RAGE(\d)$')
-
     to_rename = []
-    for f in sorted(anat_dir.iterdir()):
-        if not (f.name.endswith('.nii.gz') or f.name.endswith('.json')):
+    for name in sorted(_list_names(anat_dir)):
+        if not (name.endswith('.nii.gz') or name.endswith('.json')):
             continue
-        parsed = parse_bids_name(f.name)
-        m = mp2rage_num_re.match(parsed['suffix'])
+        parsed = parse_bids_name(name)
+        m = _MP2RAGE_NUM_RE.match(parsed['suffix'])
         if m:
-            to_rename.append((f, parsed, m.group(1)))
+            to_rename.append((anat_dir / name, parsed, m.group(1)))
 
     if not to_rename:
         return
@@ -237,22 +282,28 @@ def _normalize_mp2rage_names(anat_dir: Path, sess: Session, logger) -> None:
 # 2. Split combined inv-1and2 files
 # ============================================================
 
-def _split_inv_files(anat_dir: Path, sess: Session, logger, run: int) -> None:
+def _split_inv_files(anat_dir: Path, sess: Session, logger,
+                     run: int) -> List[Dict[str, Any]]:
     """
     Split combined inv-1and2 files into separate inv-1/inv-2 files.
 
     Discovers inv-1and2 MP2RAGE files by suffix + entity filter, then
     classifies each by its dcm2niix suffix to determine handling:
 
-    1. ``_real`` suffix -> split into inv-1/inv-2 temp files (for mag/phase)
-    2. ``_imaginary`` suffix -> split into inv-1/inv-2 temp files
+    1. ``_real`` suffix -> split into in-memory inv-1/inv-2 temps (for mag/phase)
+    2. ``_imaginary`` suffix -> split into in-memory inv-1/inv-2 temps
     3. Clean file (no dcm2niix suffix) -> split into inv-1/inv-2 final files
     4. ``_magnitude``/``_phase`` -> removed if real+imag exist (redundant)
+
+    Returns
+    -------
+    list of dict
+        The real/imag temps (see ``_split_4d_inv``) for ``_compute_mag_phase``.
     """
     inv_files = sess.find_by_suffix_parsed("anat", "MP2RAGE",
                                            {"inv": "1and2", "run": str(run)})
     if not inv_files:
-        return
+        return []
 
     # categorize by dcm2niix classification
     categorized: Dict[str, list] = {
@@ -281,12 +332,13 @@ def _split_inv_files(anat_dir: Path, sess: Session, logger, run: int) -> None:
     has_imag = len(categorized['imaginary']) > 0
 
     # split real files -> temp inv-1/inv-2 with part-real
+    temps = []
     for parsed in categorized['real']:
-        _split_4d_inv(anat_dir, parsed['path'], sess, logger, run, part_label="real")
+        temps += _split_4d_inv(anat_dir, parsed['path'], sess, logger, run, part_label="real")
 
     # split imaginary files -> temp inv-1/inv-2 with part-imag
     for parsed in categorized['imaginary']:
-        _split_4d_inv(anat_dir, parsed['path'], sess, logger, run, part_label="imag")
+        temps += _split_4d_inv(anat_dir, parsed['path'], sess, logger, run, part_label="imag")
 
     # split clean inv-1and2 -> final inv-1/inv-2 (magnitude)
     for parsed in categorized['other']:
@@ -297,15 +349,18 @@ def _split_inv_files(anat_dir: Path, sess: Session, logger, run: int) -> None:
         for parsed in categorized['magnitude']:
             path = parsed['path']
             logger.info(f"  Removing redundant magnitude (have real+imag): {path.name}")
-            json_path = path.with_suffix("").with_suffix(".json")
+            json_path = json_sidecar(path)
             sess.remove_from_scans_tsv(f"anat/{path.name}")
             path.unlink()
             if json_path.exists():
                 json_path.unlink()
 
+    return temps
+
 
 def _split_4d_inv(anat_dir: Path, nii_path: Path, sess: Session,
-                   logger, run: int, part_label: Optional[str]) -> None:
+                   logger, run: int, part_label: Optional[str]
+                   ) -> List[Dict[str, Any]]:
     """
     Split a single 4D inv-1and2 file into two 3D inv files.
 
@@ -315,60 +370,67 @@ def _split_4d_inv(anat_dir: Path, nii_path: Path, sess: Session,
     Parameters
     ----------
     part_label : str or None
-        'real' or 'imag' -> creates _temp_ intermediates for mag/phase
+        'real' or 'imag' -> returns _temp_ intermediates for mag/phase.
+        These are only consumed by ``_compute_mag_phase``, so they are
+        kept in memory rather than gzipped to disk and read back.
         None -> creates final inv-1/inv-2 magnitude files directly
+
+    Returns
+    -------
+    list of dict
+        One entry per inversion when ``part_label`` is set, with keys
+        ``name`` (temp filename), ``data``, ``affine``, ``header`` and
+        ``meta`` (sidecar dict); empty otherwise.
     """
     source_name = nii_path.name
 
     logger.info(f"  Splitting: {source_name}")
     try:
         nii = nib.load(nii_path)
-        data = nii.get_fdata()
     except Exception as e:
         logger.warning(f"Could not load {source_name}: {e}")
-        return
+        return []
 
     # read JSON sidecar
-    json_path = nii_path.with_suffix("").with_suffix(".json")
-    json_dict = {}
-    if json_path.exists():
-        try:
-            with open(json_path) as f:
-                json_dict = json.load(f)
-        except Exception:
-            pass
+    json_dict = _read_sidecar(json_sidecar(nii_path))
 
-    if data.ndim != 4 or data.shape[-1] != 2:
+    # validate from the header; each inversion is then read as its own slab
+    shape = nii.shape
+    if len(shape) != 4 or shape[-1] != 2:
         logger.warning(
-            f"Unexpected shape {data.shape} for {source_name}, "
+            f"Unexpected shape {shape} for {source_name}, "
             f"expected 4D with 2 volumes"
         )
-        return
+        return []
 
+    temps = []
     new_rels = []
     for i, inv in enumerate([1, 2]):
         if part_label:
-            # temp file for mag/phase computation
+            # temp for mag/phase computation
             out_name = _make_temp_name(source_name, inv, part_label)
         else:
             # final inv file (magnitude) — derive preserving entities
             out_name = derive_bids_name(source_name, inv=str(inv))
 
         out_nii = anat_dir / out_name
-        out_json_name = out_name.replace('.nii.gz', '.json')
-        out_json = anat_dir / out_json_name
+        out_json = json_sidecar(out_nii)
 
         try:
-            img = nib.Nifti1Image(data[..., i], nii.affine, nii.header)
-            nib.save(img, out_nii)
+            slab = np.asanyarray(nii.dataobj[..., i])
 
             meta = dict(json_dict)
-            meta["dcmmeta_shape"] = list(data[..., i].shape)
+            meta["dcmmeta_shape"] = list(slab.shape)
             if part_label:
                 meta["part"] = part_label
+                temps.append({"name": out_name, "data": slab, "affine": nii.affine,
+                              "header": nii.header, "meta": meta})
+                logger.debug(f"    Split in memory: {out_name}")
+                continue
 
-            with open(out_json, "w") as f:
-                json.dump(meta, f, indent=2)
+            img = nib.Nifti1Image(slab, nii.affine, nii.header)
+            save_nifti(img, out_nii)
+            _write_sidecar(out_json, meta)
 
             logger.info(f"    Created: {out_nii.name}")
 
@@ -380,88 +442,103 @@ def _split_4d_inv(anat_dir: Path, nii_path: Path, sess: Session,
     # update scans.tsv for non-temp files
     if new_rels:
         sess.replace_in_scans_tsv(f"anat/{source_name}", new_rels)
+    return temps
 
 
 # ============================================================
 # 3. Compute magnitude/phase from real+imaginary pairs
 # ============================================================
 
-def _compute_mag_phase(anat_dir: Path, sess: Session, logger, run: int) -> None:
+def _compute_mag_phase(anat_dir: Path, sess: Session, logger, run: int,
+                       temps: List[Dict[str, Any]]) -> None:
     """
     Compute magnitude and phase images from real+imaginary temp pairs.
 
-    Discovers temp files by glob + entity parsing. Output names are
-    derived from the temp files, which automatically strips the _temp_
-    marker and preserves all user entities.
-    """
-    for inv in [1, 2]:
-        real_f = _find_temp_file(anat_dir, run, inv, 'real')
-        imag_f = _find_temp_file(anat_dir, run, inv, 'imag')
+    Pairs the in-memory temps from ``_split_inv_files`` by entity parsing.
+    Output names are derived from the temp names, which automatically
+    strips the _temp_ marker and preserves all user entities.
 
-        if not real_f or not imag_f:
-            continue
+    The two inversions are independent and numpy/zlib release the GIL,
+    so they are processed concurrently. scans.tsv rows are added after
+    both finish, in inversion order.
+    """
+    if not temps:
+        return
+    results = run_parallel(
+        partial(_compute_mag_phase_inv, anat_dir, sess, logger, run, temps=temps),
+        [1, 2], max_workers=2,
+    )
+    for scans_rows in results:
+        for rel_path, inherited in scans_rows:
+            sess.add_to_scans_tsv(rel_path, **inherited)
 
-        logger.info(f"  Computing mag/phase for inv-{inv}")
-        try:
-            nii_r = nib.load(real_f)
-            nii_i = nib.load(imag_f)
-            rd, id_ = nii_r.get_fdata(), nii_i.get_fdata()
-        except Exception as e:
-            logger.warning(f"Could not load files for inv-{inv}: {e}")
-            continue
 
-        if rd.shape != id_.shape:
-            logger.error(
-                f"Shape mismatch inv-{inv}: real={rd.shape}, imag={id_.shape}"
-            )
-            continue
+def _compute_mag_phase_inv(anat_dir: Path, sess: Session, logger, run: int,
+                           inv: int, temps: List[Dict[str, Any]]
+                           ) -> List[Tuple[str, Dict[str, Any]]]:
+    """Compute mag/phase for one inversion; returns scans.tsv rows to add."""
+    real_t = _find_temp(temps, run, inv, 'real')
+    imag_t = _find_temp(temps, run, inv, 'imag')
 
-        mag = np.sqrt(rd**2 + id_**2)
-        phase = np.arctan2(id_, rd)
+    if not real_t or not imag_t:
+        return []
 
-        # base metadata from the real temp JSON
-        real_json = real_f.with_suffix("").with_suffix(".json")
-        base_meta = {}
-        if real_json.exists():
-            try:
-                with open(real_json) as f:
-                    base_meta = json.load(f)
-            except Exception:
-                pass
+    logger.info(f"  Computing mag/phase for inv-{inv}")
+    # float32 is plenty for scanner data and halves memory traffic versus
+    # float64; the slabs were read through dataobj, so scaling is applied.
+    # copy=True so the magnitude can be written into the imag buffer below
+    rd = np.asarray(real_t["data"], dtype=np.float32)
+    id_ = np.array(imag_t["data"], dtype=np.float32, copy=True)
 
-        # inherit scans.tsv metadata from the magnitude-only split file (if it exists)
-        mag_only_name = derive_bids_name(real_f.name, remove_entities=['part'])
-        inv_entry = sess.get_scans_entry(f"anat/{mag_only_name}")
-        inherited = {k: v for k, v in (inv_entry or {}).items() if k != "filename"}
+    if rd.shape != id_.shape:
+        logger.error(
+            f"Shape mismatch inv-{inv}: real={rd.shape}, imag={id_.shape}"
+        )
+        return []
 
-        for part_label, d in [("mag", mag), ("phase", phase)]:
-            # derive_bids_name from temp file: strips _temp_, sets part
-            out_name = derive_bids_name(real_f.name, part=part_label)
-            out_nii = anat_dir / out_name
-            out_json = anat_dir / out_name.replace('.nii.gz', '.json')
-            try:
-                nib.save(nib.Nifti1Image(d, nii_r.affine, nii_r.header), out_nii)
-                m = dict(base_meta)
-                m["dcmmeta_shape"] = list(d.shape)
-                m["part"] = part_label
-                with open(out_json, "w") as f:
-                    json.dump(m, f, indent=2)
-                logger.info(f"    Created: {out_nii.name}")
-                sess.add_to_scans_tsv(f"anat/{out_nii.name}", **(inherited or {}))
-            except Exception as e:
-                logger.warning(f"Failed: {out_name}: {e}")
+    # phase first, then magnitude into the imag buffer (no longer needed):
+    # one fresh volume allocation instead of two. inputs keep nibabel's
+    # Fortran layout; both ufuncs handle it without a contiguous copy
+    phase = np.arctan2(id_, rd)
+    mag = np.hypot(rd, id_, out=id_)
+
+    # base metadata from the real temp sidecar
+    base_meta = real_t["meta"]
+    real_name = real_t["name"]
+
+    # inherit scans.tsv metadata from the magnitude-only split file (if it exists)
+    mag_only_name = derive_bids_name(real_name, remove_entities=['part'])
+    inv_entry = sess.get_scans_entry(f"anat/{mag_only_name}")
+    inherited = {k: v for k, v in (inv_entry or {}).items() if k != "filename"}
+
+    scans_rows = []
+    for part_label, d in [("mag", mag), ("phase", phase)]:
+        # derive_bids_name from temp name: strips _temp_, sets part
+        out_name = derive_bids_name(real_name, part=part_label)
+        out_nii = anat_dir / out_name
+        out_json = anat_dir / out_name.replace('.nii.gz', '.json')
+        try:
+            save_nifti(nib.Nifti1Image(d, real_t["affine"], real_t["header"]), out_nii)
+            m = dict(base_meta)
+            m["dcmmeta_shape"] = list(d.shape)
+            m["part"] = part_label
+            _write_sidecar(out_json, m)
+            logger.info(f"    Created: {out_nii.name}")
+            scans_rows.append((f"anat/{out_nii.name}", inherited))
+        except Exception as e:
+            logger.warning(f"Failed: {out_name}: {e}")
+    return scans_rows
 
 
-def _find_temp_file(anat_dir: Path, run: int, inv: int,
-                    part_label: str) -> Optional[Path]:
-    """Find a temp intermediate file by matching run, inv, and part entities."""
-    for f in sorted(anat_dir.glob("*_temp_MP2RAGE.nii.gz")):
-        parsed = parse_bids_name(f.name)
-        e = parsed['entities']
+def _find_temp(temps: List[Dict[str, Any]], run: int, inv: int,
+               part_label: str) -> Optional[Dict[str, Any]]:
+    """Find an in-memory temp intermediate by matching run, inv, and part entities."""
+    for t in sorted(temps, key=lambda t: t["name"]):
+        e = parse_bids_name(t["name"])['entities']
         if (e.get('run') == str(run) and
                 e.get('inv') == str(inv) and
                 e.get('part') == part_label):
-            return f
+            return t
     return None
 
 
@@ -481,21 +558,55 @@ def _reshape_unit1(anat_dir: Path, sess: Session, logger, run: int) -> None:
     for t1w in t1w_files:
         try:
             nii = nib.load(t1w)
-            data = nii.get_fdata()
         except Exception:
             continue
 
-        if data.ndim == 4 and 1 in data.shape:
-            logger.info(f"  Reshaping T1w from {data.shape} to 3D")
-            new_data = data.squeeze()
-            new_nii = nib.Nifti1Image(new_data, nii.affine)
-            new_nii.header.set_xyzt_units(*nii.header.get_xyzt_units())
-            tmp = anat_dir / ".t1w_tmp.nii.gz"
-            nib.save(new_nii, tmp)
-            tmp.replace(t1w)
+        # decide from the header shape; data is only read when reshaping
+        shape = nii.shape
+        if len(shape) == 4 and 1 in shape:
+            logger.info(f"  Reshaping T1w from {shape} to 3D")
+            # per-file temp name: runs may be reshaped concurrently
+            tmp = anat_dir / f".tmp_{t1w.name}"
+            try:
+                if shape[3] == 1:
+                    # trailing dummy axis: spatial header fields still line up
+                    _squeeze_nifti_header(t1w, nii, tmp)
+                else:
+                    # index out the dummy axes in the on-disk dtype
+                    slicer = tuple(0 if n == 1 else slice(None) for n in shape)
+                    new_data = np.asanyarray(nii.dataobj[slicer])
+                    new_nii = nib.Nifti1Image(new_data, nii.affine, nii.header)
+                    new_nii.header.set_xyzt_units(*nii.header.get_xyzt_units())
+                    save_nifti(new_nii, tmp)
+                tmp.replace(t1w)
+            finally:
+                tmp.unlink(missing_ok=True)
             logger.info(f"  Reshaped: {t1w.name}")
 
 
+def _squeeze_nifti_header(src: Path, nii, dst: Path) -> None:
+    """
+    Write ``src`` to ``dst`` with a trailing size-1 axis dropped from the
+    header only.
+
+    Removing a length-1 axis leaves the (Fortran-ordered) voxel bytes
+    unchanged, so the header is rewritten and everything after it is
+    streamed through as-is: no array decode, scaling or full-volume copy.
+    Extensions and vox_offset are untouched, as the header size is fixed.
+    """
+    header_klass = type(nii.header)
+    new_shape = nii.shape[:3]
+
+    # compresslevel 1 matches nibabel's default for .nii.gz
+    with gzip.open(src, "rb") as fin, gzip.open(dst, "wb", compresslevel=1) as fout:
+        # edit the on-disk header block (nii.header has vox_offset reset)
+        raw = fin.read(header_klass.sizeof_hdr)
+        hdr = header_klass(binaryblock=raw, check=False)
+        hdr.set_data_shape(new_shape)
+        fout.write(hdr.binaryblock)
+        shutil.copyfileobj(fin, fout, 1024 * 1024)
+
+
 # ============================================================
 # 5. MP2RAGE metadata injection
 # ============================================================
@@ -536,22 +647,13 @@ def _inject_mp2rage_metadata(anat_dir: Path, sess: Session, logger,
             # skip temp intermediate files
             if '_temp_' in json_path.name:
                 continue
+            updates = dict(common, **inv_params)
+            # add Units for phase images
+            parsed = parse_bids_name(json_path.name)
+            if parsed['entities'].get('part') == 'phase':
+                updates["Units"] = "rad"
             try:
-                with open(json_path) as f:
-                    meta = json.load(f)
-                meta.update(common)
-                meta.update(inv_params)
-
-                # add Units for phase images
-                parsed = parse_bids_name(json_path.name)
-                if parsed['entities'].get('part') == 'phase':
-                    meta["Units"] = "rad"
-
-                sess.make_writable(json_path)
-                with open(json_path, "w") as f:
-                    json.dump(meta, f, indent=2)
-                sess.make_readonly(json_path)
-                logger.info(f"  Injected MP2RAGE metadata: {json_path.name}")
+                _update_json(sess, json_path, updates, logger)
             except Exception as e:
                 logger.warning(f"Could not update {json_path.name}: {e}")
 
@@ -564,31 +666,62 @@ def _inject_mp2rage_metadata(anat_dir: Path, sess: Session, logger,
 
     for json_path in t1w_jsons:
         try:
-            with open(json_path) as f:
-                meta = json.load(f)
-            meta.update(common)
-            sess.make_writable(json_path)
-            with open(json_path, "w") as f:
-                json.dump(meta, f, indent=2)
-            sess.make_readonly(json_path)
-            logger.info(f"  Injected MP2RAGE metadata: {json_path.name}")
+            _update_json(sess, json_path, common, logger)
         except Exception as e:
             logger.warning(f"Could not update T1w JSON: {e}")
 
 
+def _update_json(sess: Session, json_path: Path, updates: Dict[str, Any],
+                 logger) -> bool:
+    """
+    Merge ``updates`` into a read-only JSON sidecar.
+
+    The file is only unlocked and rewritten when the merge changes it, so
+    reruns over already-injected sidecars do no writes or chmods.
+
+    Returns
+    -------
+    bool
+        True if the file was rewritten.
+    """
+    meta = json.loads(json_path.read_bytes())
+    merged = {**meta, **updates}
+    if merged == meta:
+        logger.debug(f"  MP2RAGE metadata already present: {json_path.name}")
+        return False
+    with sess.writable_scope(json_path):
+        _write_sidecar(json_path, merged)
+    logger.info(f"  Injected MP2RAGE metadata: {json_path.name}")
+    return True
+
+
 # ============================================================
 # 6. Cleanup
 # ============================================================
 
-def _remove_combined_files(anat_dir: Path, sess: Session, logger) -> None:
+def _remove_combined_files(anat_dir: Path, sess: Session, logger,
+                           names: Set[str]) -> None:
     """Remove original combined inv-1and2 files (including any dcm2niix suffixes)."""
-    for f in sorted(anat_dir.glob("*inv-1and2*")):
-        f.unlink()
-        logger.info(f"Removed combined: {f.name}")
-
-
-def _remove_temp_files(anat_dir: Path, sess: Session, logger) -> None:
-    """Remove temp intermediate files created during mag/phase computation."""
-    for f in sorted(anat_dir.glob("*_temp_MP2RAGE*")):
-        f.unlink()
-        logger.debug(f"Removed temp: {f.name}")
\ No newline at end of file
+    removed = _remove_matching(anat_dir, names, "inv-1and2", logger)
+    if removed:
+        logger.info(f"Removed {removed} combined file(s)")
+
+
+def _remove_temp_files(anat_dir: Path, sess: Session, logger,
+                       names: Set[str]) -> None:
+    """Remove leftover temp intermediates (older versions wrote them to disk)."""
+    removed = _remove_matching(anat_dir, names, "_temp_MP2RAGE", logger)
+    if removed:
+        logger.debug(f"Removed {removed} temp file(s)")
+
+
+def _remove_matching(anat_dir: Path, names: Set[str], marker: str,
+                     logger) -> int:
+    """Unlink every listed name containing ``marker``; returns the count."""
+    anat_s = os.fspath(anat_dir)
+    removed = 0
+    for name in sorted(n for n in names if marker in n):
+        os.unlink(os.path.join(anat_s, name))
+        logger.debug(f"  Removed: {name}")
+        removed += 1
+    return removed
@@ -5,6 +5,7 @@ Reads Philips-specific DICOM tags from sourcedata to compute
 TotalReadoutTime and sets PhaseEncodingDirection for SE-EPI fieldmaps.
 """
 
+import os
 from pathlib import Path
 from typing import Optional, Dict, List
 import pydicom
@@ -104,41 +105,61 @@ def _update_direction_jsons(fmap_dir: Path, sourcedata_dir: Path,
         logger.warning(f"No DICOM series found for {direction}")
         return
 
-    dcm_files = list(series_dirs[0].glob("*.dcm"))
-    if not dcm_files:
+    # first .dcm/.DCM in the series; stops at the first match
+    with os.scandir(series_dirs[0]) as it:
+        dcm_name = next((e.name for e in it if e.name.lower().endswith(".dcm")), None)
+    if dcm_name is None:
         return
 
-    dcm_file = dcm_files[0]
+    dcm_file = series_dirs[0] / dcm_name
     logger.info(f"Using DICOM {dcm_file.name} for {direction} metadata")
 
+    # the same DICOM serves every JSON of this direction: read it once, on
+    # first need, and only the three tags the readout formula uses
+    trt = None
     for json_file in epi_jsons:
-        nii_file = json_file.with_suffix("").with_suffix(".nii.gz")
-        # handle .nii.gz -> the json might correspond to a .nii.gz file
-        if not nii_file.exists():
-            nii_file = json_file.with_suffix(".nii.gz")
-        meta = sess.get_json(nii_file)
+        meta = sess.get_json(json_file)
 
         if (not force and
                 "TotalReadoutTime" in meta and
                 "PhaseEncodingDirection" in meta):
             continue
 
-        try:
-            ds = pydicom.dcmread(str(dcm_file))
-            wfs = ds[0x2001, 0x1022].value   # Water Fat Shift (Philips)
-            imf = ds[0x0018, 0x0084].value   # Imaging Frequency
-            epf = ds[0x2001, 0x1013].value   # EPI Factor (Philips)
-        except Exception as e:
-            logger.error(f"Error reading DICOM: {e}")
-            continue
+        if trt is None:
+            try:
+                trt = _total_readout_time(dcm_file)
+            except Exception as e:
+                logger.error(f"Error reading DICOM: {e}")
+                return
 
-        # Philips TotalReadoutTime formula
-        aes = wfs / (imf * 3.4 * (epf + 1))
-        trt = aes * epf
+        # --force with unchanged values: skip the chmod/write round-trip
+        if meta.get("PhaseEncodingDirection") == ped and meta.get("TotalReadoutTime") == trt:
+            continue
 
-        sess.make_writable(json_file)
         meta["PhaseEncodingDirection"] = ped
         meta["TotalReadoutTime"] = trt
-        sess.write_json(nii_file, meta)
-        sess.make_readonly(json_file)
-        logger.info(f"Updated {json_file.name}: PED={ped}, TRT={trt:.6f}")
\ No newline at end of file
+        sess.write_json(json_file, meta, readonly=True)
+        logger.info(f"Updated {json_file.name}: PED={ped}, TRT={trt:.6f}")
+
+
+# Philips private/standard tags used for TotalReadoutTime
+_WATER_FAT_SHIFT = (0x2001, 0x1022)
+_IMAGING_FREQUENCY = (0x0018, 0x0084)
+_EPI_FACTOR = (0x2001, 0x1013)
+# private creator for group 2001; without it pydicom can't resolve the VR of
+# the private tags above in implicit-VR files and returns raw bytes
+_PHILIPS_PRIVATE_CREATOR = (0x2001, 0x0010)
+
+
+def _total_readout_time(dcm_file: Path) -> float:
+    """Philips TotalReadoutTime from WaterFatShift, ImagingFrequency and EPI factor."""
+    ds = pydicom.dcmread(
+        str(dcm_file), stop_before_pixels=True,
+        specific_tags=[_PHILIPS_PRIVATE_CREATOR, _WATER_FAT_SHIFT,
+                       _IMAGING_FREQUENCY, _EPI_FACTOR],
+    )
+    wfs = ds[_WATER_FAT_SHIFT].value
+    imf = ds[_IMAGING_FREQUENCY].value
+    epf = ds[_EPI_FACTOR].value
+    aes = wfs / (imf * 3.4 * (epf + 1))
+    return aes * epf
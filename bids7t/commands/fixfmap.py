@@ -23,11 +23,13 @@ Supported B1 sequences:
     _r20 (rescaled), _ph/_r100_ph/_r20_ph (phases).
 """
 
+import os
 import re
+import json
 from pathlib import Path
 from typing import Optional
 
-from bids7t.core import Session, setup_logging
+from bids7t.core import Session, setup_logging, json_sidecar
 from bids7t.core.bids_naming import (
     parse_bids_name,
     derive_bids_name,
@@ -57,24 +59,30 @@ def run_fixfmap(
     session_label = f"_ses-{session}" if session else ""
     logger.info(f"Fixing fieldmap files for sub-{subject}{session_label}")
 
-    if not list(fmap_dir.glob("*.nii.gz")):
+    # stop at the first NIfTI rather than listing them all
+    with os.scandir(fmap_dir) as it:
+        has_nifti = any(e.name.endswith(".nii.gz") and not e.name.startswith(".")
+                        for e in it)
+    if not has_nifti:
         logger.info("No NIfTI files in fmap directory, nothing to fix")
         return
 
-    # 1. B1 map outputs (TB1map — uses JSON metadata for classification)
-    _fix_b1_outputs(fmap_dir, sess, logger, force)
+    # scans.tsv is read once and written once for the whole command
+    with sess.scans_tsv_batch():
+        # 1. B1 map outputs (TB1map — uses JSON metadata for classification)
+        _fix_b1_outputs(fmap_dir, sess, logger, force)
 
-    # 2. Fieldmap echo-based outputs (fieldmap/epi with _e1/_e1a/_e1_ph)
-    _fix_fieldmap_echo_outputs(fmap_dir, sess, logger, force)
+        # 2. Fieldmap echo-based outputs (fieldmap/epi with _e1/_e1a/_e1_ph)
+        _fix_fieldmap_echo_outputs(fmap_dir, sess, logger, force)
 
-    # 3. Numbered variants (fieldmap1/2, epi1/2, b0-combined1/2)
-    _fix_numbered_variants(fmap_dir, sess, logger, force)
+        # 3. Numbered variants (fieldmap1/2, epi1/2, b0-combined1/2)
+        _fix_numbered_variants(fmap_dir, sess, logger, force)
 
-    # 4. Strip invalid dir- entity from fieldmap/magnitude
-    _strip_dir_from_non_epi(fmap_dir, sess, logger, force)
+        # 4. Strip invalid dir- entity from fieldmap/magnitude
+        _strip_dir_from_non_epi(fmap_dir, sess, logger, force)
 
-    # 5. Units metadata on fieldmap JSONs
-    _add_units_to_fieldmaps(fmap_dir, sess, logger)
+        # 5. Units metadata on fieldmap JSONs
+        _add_units_to_fieldmaps(fmap_dir, sess, logger)
 
     logger.info("Fieldmap fixes complete")
 
@@ -88,7 +96,7 @@ def _remove_with_sidecar(nii_path: Path, sess: Session, logger) -> None:
     logger.info(f"  Removing intermediate: {nii_path.name}")
     sess.remove_from_scans_tsv(f"fmap/{nii_path.name}")
     nii_path.unlink(missing_ok=True)
-    json_path = nii_path.with_suffix("").with_suffix(".json")
+    json_path = json_sidecar(nii_path)
     if json_path.exists():
         json_path.unlink()
 
@@ -105,31 +113,34 @@ def _rename_pair(fmap_dir: Path, src_nii: Path, dst_name: str,
         return  # already has the correct name
 
     dst_nii = fmap_dir / dst_name
-    src_json = src_nii.with_suffix("").with_suffix(".json")
-    dst_json_name = derive_bids_name(dst_name, extension='.json')
-    dst_json = fmap_dir / dst_json_name
+    src_json = json_sidecar(src_nii)
+    dst_json = json_sidecar(dst_nii)
 
     # if target exists: remove src as duplicate (unless force)
-    if dst_nii.exists() and not force:
+    if not force and dst_nii.exists():
         logger.info(f"  Removing duplicate (target exists): {src_nii.name}")
         sess.remove_from_scans_tsv(f"fmap/{src_nii.name}")
         src_nii.unlink()
-        if src_json.exists():
-            src_json.unlink()
+        src_json.unlink(missing_ok=True)
         return
 
-    # rename NIfTI
-    if src_nii.exists():
-        sess.rename_file(src_nii, dst_nii)
+    # rename NIfTI; same directory, so try it rather than probing first
+    try:
+        os.rename(src_nii, dst_nii)
+    except FileNotFoundError:
+        pass
+    else:
         logger.info(f"  Renamed: {src_nii.name} -> {dst_name}")
         sess.rename_in_scans_tsv(f"fmap/{src_nii.name}", f"fmap/{dst_name}")
 
     # rename JSON sidecar
-    if src_json.exists():
-        if dst_json.exists() and not force:
-            src_json.unlink()
-        else:
-            sess.rename_file(src_json, dst_json)
+    if not force and dst_json.exists():
+        src_json.unlink(missing_ok=True)
+    else:
+        try:
+            os.rename(src_json, dst_json)
+        except FileNotFoundError:
+            pass
 
 
 # ============================================================
@@ -360,12 +371,16 @@ def _fix_numbered_variants(fmap_dir: Path, sess: Session, logger, force: bool) -
     All user entities are preserved through the rename.
     """
     # collect files first to avoid modifying dir while iterating
+    # names from one scandir; Paths only for the matches
+    with os.scandir(fmap_dir) as it:
+        names = sorted(e.name for e in it
+                       if e.name.endswith(".nii.gz") and not e.name.startswith("."))
     to_process = []
-    for f in sorted(fmap_dir.glob("*.nii.gz")):
-        parsed = parse_bids_name(f.name)
+    for name in names:
+        parsed = parse_bids_name(name)
         m = _NUMBERED_PATTERN.match(parsed['suffix'])
         if m:
-            to_process.append((f, parsed, m.group(1), int(m.group(2))))
+            to_process.append((fmap_dir / name, parsed, m.group(1), int(m.group(2))))
 
     if not to_process:
         return
@@ -438,16 +453,16 @@ def _add_units_to_fieldmaps(fmap_dir: Path, sess: Session, logger) -> None:
     )
 
     for nii in fieldmap_files:
-        json_f = nii.with_suffix("").with_suffix(".json")
-        if not json_f.exists():
+        json_f = json_sidecar(nii)
+        # one read per sidecar; a missing sidecar is skipped
+        try:
+            raw = json_f.read_bytes()
+        except FileNotFoundError:
             continue
-
-        meta = sess.get_json(nii)
+        meta = json.loads(raw)
         if meta.get("Units") == "rad/s":
             continue
 
-        sess.make_writable(json_f)
         meta["Units"] = "rad/s"
-        sess.write_json(nii, meta)
-        sess.make_readonly(json_f)
+        sess.write_json(json_f, meta, readonly=True)
         logger.info(f"  Added Units=rad/s to {json_f.name}")
\ No newline at end of file
@@ -1,9 +1,11 @@
 """qc. runs MRIQC quality control."""
 
-import subprocess, shutil
+import os, subprocess, shutil
 from pathlib import Path
 from typing import List, Optional
-from bids7t.core import Session, setup_logging, get_docker_user_args
+from bids7t.core import Session, setup_logging, get_docker_user_args, ensure_docker_image
+
+MRIQC_IMAGE = "nipreps/mriqc:latest"
 
 
 def run_qc(studydir: Path, subject: str, session: Optional[str] = None,
@@ -33,16 +35,29 @@ def run_qc(studydir: Path, subject: str, session: Optional[str] = None,
     mriqc_out.mkdir(parents=True, exist_ok=True)
     mriqc_work.mkdir(parents=True, exist_ok=True)
     user_args = get_docker_user_args()
-    cmd = ["docker", "run", "--rm", *user_args,
+    ensure_docker_image(MRIQC_IMAGE, logger)
+    # docker refuses --cpus above the host count, and mriqc can't use more
+    n_procs = max(1, min(n_procs, os.cpu_count() or 1))
+    # --mem_gb is mriqc's scheduling target, not a ceiling: leave headroom
+    # above it so the container isn't OOM-killed at the budget
+    mem_limit_gb = mem_gb + max(2, mem_gb // 2)
+    cmd = ["docker", "run", "--rm", "--pull=never", "--init",
+           "--cpus", str(n_procs), "--memory", f"{mem_limit_gb}g",
+           *user_args,
            "--volume", f"{rawdata_root}:/data:ro", "--volume", f"{mriqc_out}:/out",
-           "--volume", f"{mriqc_work}:/work", "nipreps/mriqc:latest",
+           "--volume", f"{mriqc_work}:/work", MRIQC_IMAGE,
            "/data", "/out", "participant", "--participant-label", subject]
     if session:
         cmd.extend(["--session-id", session])
-    cmd.extend(["-w", "/work", "--verbose-reports", "--mem_gb", str(mem_gb),
-                "--nprocs", str(n_procs), "--no-sub", "--modalities", *modalities])
-    with open(log_file, "w") as logf:
-        result = subprocess.run(cmd, stdout=logf, stderr=subprocess.STDOUT)
+    cmd.extend(["-w", "/work"])
+    if verbose:
+        cmd.append("--verbose-reports")
+    cmd.extend(["--mem_gb", str(mem_gb),
+                "--nprocs", str(n_procs), "--omp-nthreads", "1",
+                "--no-sub", "--modalities", *modalities])
+    # binary mode: the container writes straight to the file descriptor
+    with open(log_file, "wb") as logf:
+        result = subprocess.run(cmd, stdout=logf, stderr=subprocess.STDOUT, close_fds=True)
     if mriqc_work.exists():
         shutil.rmtree(mriqc_work, ignore_errors=True)
     if result.returncode != 0:
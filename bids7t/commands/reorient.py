@@ -1,69 +1,124 @@
 """
-reorient command. reorients images to LPI orientation using FSL or nibabel.
+reorient command. reorients images to LPI orientation using nibabel (or FSL with --fsl).
 
 for more information about this see: 
 https://github.com/tknapen/tknapen.github.io/wiki/Anatomical-workflows#coordinate-systems-across-software-packages
 """
 
+import os
 import subprocess
+from functools import partial
 from pathlib import Path
 from typing import Optional
 import nibabel as nib
 import numpy as np
-from bids7t.core import Session, setup_logging, find_files
+from bids7t.core import Session, setup_logging, find_files, save_nifti, run_parallel
+
+# fsl-style axis codes: each letter names the end the axis starts from
+_FSL_PAIRS = {"L": "LR", "R": "RL", "A": "AP", "P": "PA", "S": "SI", "I": "IS"}
 
 
 def run_reorient(studydir: Path, subject: str, session: Optional[str] = None,
                  orientation: str = "LPI", modality: str = "all",
-                 force: bool = False, verbose: bool = False) -> None:
+                 force: bool = False, verbose: bool = False,
+                 use_fsl: bool = False, jobs: Optional[int] = None) -> None:
     sess = Session(studydir, subject, session)
     log_file = sess.paths["logs"] / "reorient.log"
     logger = setup_logging("reorient", log_file, verbose)
     rawdata = sess.paths["rawdata"]
     if not rawdata.exists():
         logger.warning(f"rawdata not found: {rawdata}"); return
+    # checked once up front rather than failing every file in the pool
+    try:
+        target = _target_axcodes(orientation)
+    except KeyError:
+        target = ""
+    if len(target) != 3:
+        logger.error(f"Invalid orientation: {orientation}"); return
     session_label = f"_ses-{session}" if session else ""
     logger.info(f"Reorienting for sub-{subject}{session_label}, target: {orientation}")
     mods = ["anat", "func", "fmap", "dwi"] if modality == "all" else [modality]
-    total = 0
+    niftis = []
     for mod in mods:
         mod_dir = rawdata / mod
-        if not mod_dir.exists():
-            continue
-        niftis = find_files(mod_dir, "*.nii.gz")
-        for nii in niftis:
-            current = _get_orientation(nii)
-            if current == orientation.upper() and not force:
-                continue
-            logger.info(f"Reorienting {nii.name}: {current} -> {orientation}")
-            try:
-                _reorient(str(nii), orientation, str(nii))
-                total += 1
-            except Exception as e:
-                logger.error(f"Failed: {nii.name}: {e}")
+        if mod_dir.exists():
+            niftis.extend(find_files(mod_dir, "*.nii.gz"))
+
+    # files are independent; gzip, numpy and fslswapdim all run outside the GIL.
+    # each worker holds a whole (possibly 4D) image, so jobs stays small
+    total = sum(run_parallel(
+        partial(_reorient_file, orientation=orientation, target=target,
+                force=force, use_fsl=use_fsl, logger=logger),
+        niftis, max_workers=jobs,
+    ))
     logger.info(f"Reorientation complete. Processed {total} files.")
 
 
+def _reorient_file(nii, orientation, target, force, use_fsl, logger) -> bool:
+    try:
+        current = _get_orientation(nii)
+        if current == target and not force:
+            return False
+        logger.info(f"Reorienting {nii.name}: {current} -> {target}")
+        _reorient(str(nii), orientation, str(nii), use_fsl=use_fsl)
+        return True
+    except Exception as e:
+        logger.error(f"Failed: {nii.name}: {e}")
+        return False
+
+
+def _target_axcodes(code):
+    # nibabel axcodes name the end an axis points to, fsl codes the end it starts from
+    if code.upper() == "NB":
+        return "RAS"
+    return "".join(_FSL_PAIRS[c][1] for c in code.upper())
+
+
 def _get_orientation(path):
-    img = nib.load(path)
-    return "".join(nib.orientations.aff2axcodes(img.affine))
+    path = str(path)
+    try:
+        # header block only; the image data is never decompressed
+        with nib.openers.ImageOpener(path) as f:
+            affine = nib.Nifti1Header.from_fileobj(f).get_best_affine()
+    except Exception:
+        affine = nib.load(path).affine
+    return "".join(nib.orientations.aff2axcodes(affine))
 
 
-def _reorient(img_path, code, out):
+def _reorient(img_path, code, out, use_fsl=False):
     if code.upper() == "NB":
         img = nib.load(img_path)
         ras = nib.as_closest_canonical(img)
         ras.to_filename(out)
         return
-    pairs = {"L":"LR","R":"RL","A":"AP","P":"PA","S":"SI","I":"IS"}
-    orient_parts = [pairs[c] for c in code.upper()]
-    tmp = out.replace(".nii.gz", "_tmp.nii.gz")
+    orient_parts = [_FSL_PAIRS[c] for c in code.upper()]
+    # written next to the input and renamed over it, so a failure never
+    # leaves a half-written image; a failed attempt never leaves the tmp
+    tmp = out[:-7] + "_tmp.nii.gz" if out.endswith(".nii.gz") else out + "_tmp.nii.gz"
+    try:
+        if use_fsl:
+            _fslswapdim(img_path, orient_parts, tmp)
+        else:
+            # in-process: one transpose/flip per axis, no fork or extra file pass
+            img = nib.load(img_path)
+            start = nib.orientations.io_orientation(img.affine)
+            target = nib.orientations.axcodes2ornt(tuple(p[1] for p in orient_parts))
+            xform = nib.orientations.ornt_transform(start, target)
+            save_nifti(img.as_reoriented(xform), tmp)
+        os.replace(tmp, out)
+    finally:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+
+
+def _fslswapdim(img_path, orient_parts, tmp):
     cmd = ["fslswapdim", img_path] + orient_parts + [tmp]
     try:
-        subprocess.run(cmd, capture_output=True, text=True, check=True)
+        subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=True)
     except subprocess.CalledProcessError:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
         if orient_parts[0] == "LR": orient_parts[0] = "RL"
         elif orient_parts[0] == "RL": orient_parts[0] = "LR"
         cmd = ["fslswapdim", img_path] + orient_parts + [tmp]
-        subprocess.run(cmd, capture_output=True, text=True, check=True)
-    Path(tmp).replace(out)
\ No newline at end of file
+        subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=True)
@@ -1,8 +1,21 @@
 # run-all command. run all conversion steps in sequence
 
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
 from pathlib import Path
-from typing import Optional
-from bids7t.core import Session, setup_logging
+from typing import Dict, List, Optional, Tuple
+from bids7t.core import Session, setup_logging, load_config, detect_sessions
+from bids7t.commands.init import run_init
+from bids7t.commands.dcm2src import run_dcm2src
+from bids7t.commands.src2rawdata import run_src2rawdata
+from bids7t.commands.fixanat import run_fixanat
+from bids7t.commands.fixfmap import run_fixfmap
+from bids7t.commands.fixepi import run_fixepi
+from bids7t.commands.reorient import run_reorient
+from bids7t.commands.slicetime import run_slicetime
+from bids7t.commands.validate import run_validate, DockerValidator
+from bids7t.commands.qc import run_qc
 
 
 def run_all_steps(
@@ -15,9 +28,12 @@ def run_all_steps(
     log_file = sess.paths["logs"] / "run_all.log"
     logger = setup_logging("run_all", log_file, verbose)
     
+    # load the study config once; shared by dicomdir lookup and src2rawdata
+    config = _load_config(studydir, config_path)
+    
     # resolve dicomdir from config if not provided on command line
     if dicom_dir is None:
-        dicom_dir = _resolve_dicomdir(studydir, config_path, logger)
+        dicom_dir = _resolve_dicomdir(config, logger)
     
     session_label = f"ses-{session}" if session else "(detect from files)"
     
@@ -35,7 +51,7 @@ def run_all_steps(
     logger.info("")
     logger.info(">>> Step: init")
     logger.info("-" * 40)
-    _run_init(studydir=studydir, verbose=verbose)
+    run_init(studydir=studydir, verbose=verbose, force=False)
     logger.info("init completed")
     
     # dcm2src
@@ -43,14 +59,13 @@ def run_all_steps(
         logger.info("")
         logger.info(">>> Command: dcm2src")
         logger.info("-" * 40)
-        _run_dcm2src(studydir=studydir, subject=subject, session=session,
-                      dicom_dir=dicom_dir, force=force, verbose=verbose)
+        run_dcm2src(studydir=studydir, subject=subject, session=session,
+                    dicom_dir=dicom_dir, force=force, verbose=verbose)
         logger.info("dcm2src completed")
     else:
         logger.info("No --dicom-dir and no dicomdir in config, skipping dcm2src")
     
     # re-detect sessions after dcm2src may have created session directories
-    from bids7t.core import detect_sessions
     if session is not None:
         sessions = [session]
     else:
@@ -60,38 +75,44 @@ def run_all_steps(
     
     # commands to run per-session
     per_session_steps = [
-        ("src2rawdata", lambda **kw: _run_src2rawdata(config_path=config_path, **kw)),
-        ("fixanat", _run_fixanat),
-        ("fixfmap", _run_fixfmap),
-        ("fixepi", _run_fixepi),
-        ("reorient", _run_reorient),
-        ("slicetime", _run_slicetime),
+        ("src2rawdata", lambda **kw: run_src2rawdata(config_path=config_path, config=config, **kw)),
+        ("fixanat", run_fixanat),
+        ("fixfmap", run_fixfmap),
+        ("fixepi", run_fixepi),
+        ("reorient", run_reorient),
+        ("slicetime", run_slicetime),
     ]
     
+    # several sessions: keep one validator container up instead of one per session
+    validator = None
+    if not skip_validate and len(sessions) > 1 and shutil.which("bids-validator") is None:
+        validator = DockerValidator(studydir, logger)
     if not skip_validate:
-        per_session_steps.append(("validate", _run_validate))
+        per_session_steps.append(("validate", lambda **kw: run_validate(validator=validator, **kw)))
     if not skip_qc:
-        per_session_steps.append(("qc", _run_qc))
+        per_session_steps.append(("qc", run_qc))
     
-    for ses in sessions:
-        ses_label = f"ses-{ses}" if ses else "(no session)"
-        logger.info("")
-        logger.info(f"{'=' * 40}")
-        logger.info(f"Processing {ses_label}")
-        logger.info(f"{'=' * 40}")
-        
-        for step_name, step_func in per_session_steps:
+    with validator or nullcontext():
+        for ses in sessions:
+            ses_label = f"ses-{ses}" if ses else "(no session)"
             logger.info("")
-            logger.info(f">>> Command: {step_name} [{ses_label}]")
-            logger.info("-" * 40)
-            try:
-                step_func(studydir=studydir, subject=subject, session=ses,
-                          force=force, verbose=verbose)
-                logger.info(f"{step_name} completed")
-            except Exception as e:
-                logger.error(f"{step_name} failed: {e}")
-                logger.error("Stopping pipeline")
-                raise
+            logger.info(f"{'=' * 40}")
+            logger.info(f"Processing {ses_label}")
+            logger.info(f"{'=' * 40}")
+        
+            step_kwargs = dict(studydir=studydir, subject=subject, session=ses,
+                               force=force, verbose=verbose)
+            for step_name, step_func in per_session_steps:
+                logger.info("")
+                logger.info(f">>> Command: {step_name} [{ses_label}]")
+                logger.info("-" * 40)
+                try:
+                    step_func(**step_kwargs)
+                    logger.info(f"{step_name} completed")
+                except Exception as e:
+                    logger.error(f"{step_name} failed: {e}")
+                    logger.error("Stopping pipeline")
+                    raise
     
     logger.info("")
     logger.info("=" * 60)
@@ -99,60 +120,71 @@ def run_all_steps(
     logger.info("=" * 60)
 
 
-def _resolve_dicomdir(studydir, config_path, logger):
-    try:
-        from bids7t.core import load_config
-        config = load_config(studydir, config_path=config_path)
-        dicomdir = config.get("dicomdir")
-        if dicomdir:
-            path = Path(dicomdir)
-            if path.exists():
-                logger.info(f"Using dicomdir from config: {path}")
-                return path
-            logger.warning(f"dicomdir in config not found: {path}")
-    except Exception:
-        pass
-    return None
-
-
-def _run_init(studydir, verbose):
-    from bids7t.commands.init import run_init
+def run_all_many(
+    studydir: Path, subject_sessions: List[Tuple[str, Optional[str]]],
+    dicom_dirs: Optional[Dict[Tuple[str, Optional[str]], Path]] = None,
+    config_path: Optional[Path] = None,
+    force: bool = False, verbose: bool = False,
+    skip_validate: bool = False, skip_qc: bool = True,
+    max_workers: int = 2
+) -> None:
+    """Run the full pipeline for several (subject, session) pairs in parallel.
+
+    Each pair runs run_all_steps in its own worker process; subjects write to
+    disjoint directories and each already logs to its own file. ``dicom_dirs``
+    maps (subject, session) to that pair's DICOM input.
+
+    The validator checks the whole rawdata/ tree, so it is not run inside the
+    workers (siblings would still be writing); it runs once after the pool.
+
+    The steps inside each worker already run their own pools (dcm2niix
+    conversion per CPU; fixanat, reorient and slicetime via run_parallel, with
+    pigz sharing the CPU budget), so max_workers multiplies CPU use. It
+    defaults to 2 so that I/O-bound steps overlap without heavily
+    oversubscribing the machine.
+    """
+    dicom_dirs = dicom_dirs or {}
+    # study top-level files are shared; create them before the workers race
     run_init(studydir=studydir, verbose=verbose, force=False)
 
-def _run_dcm2src(studydir, subject, session, dicom_dir, force, verbose):
-    from bids7t.commands.dcm2src import run_dcm2src
-    run_dcm2src(studydir=studydir, subject=subject, session=session,
-                dicom_dir=dicom_dir, force=force, verbose=verbose)
-
-def _run_src2rawdata(studydir, subject, session, force, verbose, config_path=None):
-    from bids7t.commands.src2rawdata import run_src2rawdata
-    run_src2rawdata(studydir=studydir, subject=subject, session=session,
-                    config_path=config_path, force=force, verbose=verbose)
-
-def _run_fixanat(studydir, subject, session, force, verbose):
-    from bids7t.commands.fixanat import run_fixanat
-    run_fixanat(studydir=studydir, subject=subject, session=session, force=force, verbose=verbose)
-
-def _run_fixfmap(studydir, subject, session, force, verbose):
-    from bids7t.commands.fixfmap import run_fixfmap
-    run_fixfmap(studydir=studydir, subject=subject, session=session, force=force, verbose=verbose)
-
-def _run_fixepi(studydir, subject, session, force, verbose):
-    from bids7t.commands.fixepi import run_fixepi
-    run_fixepi(studydir=studydir, subject=subject, session=session, force=force, verbose=verbose)
-
-def _run_reorient(studydir, subject, session, force, verbose):
-    from bids7t.commands.reorient import run_reorient
-    run_reorient(studydir=studydir, subject=subject, session=session, force=force, verbose=verbose)
-
-def _run_slicetime(studydir, subject, session, force, verbose):
-    from bids7t.commands.slicetime import run_slicetime
-    run_slicetime(studydir=studydir, subject=subject, session=session, force=force, verbose=verbose)
+    failed, done = [], []
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = {
+            pool.submit(run_all_steps, studydir=studydir, subject=subject, session=ses,
+                        dicom_dir=dicom_dirs.get((subject, ses)), config_path=config_path,
+                        force=force, verbose=verbose,
+                        skip_validate=True, skip_qc=skip_qc): (subject, ses)
+            for subject, ses in subject_sessions
+        }
+        for future, (subject, ses) in futures.items():
+            try:
+                future.result()
+                done.append((subject, ses))
+            except Exception as e:
+                label = f"sub-{subject}" + (f"_ses-{ses}" if ses else "")
+                failed.append(f"{label} ({type(e).__name__}: {e})")
+    if not skip_validate and done:
+        # logged under the first completed pair, like a single run-all would
+        subject, ses = done[0]
+        run_validate(studydir=studydir, subject=subject, session=ses,
+                     force=force, verbose=verbose)
+    if failed:
+        raise RuntimeError("Pipeline failed for:\n  " + "\n  ".join(failed))
+
+
+def _load_config(studydir, config_path):
+    try:
+        return load_config(studydir, config_path=config_path)
+    except Exception:
+        return None
 
-def _run_validate(studydir, subject, session, force, verbose):
-    from bids7t.commands.validate import run_validate
-    run_validate(studydir=studydir, subject=subject, session=session, force=force, verbose=verbose)
 
-def _run_qc(studydir, subject, session, force, verbose):
-    from bids7t.commands.qc import run_qc
-    run_qc(studydir=studydir, subject=subject, session=session, force=force, verbose=verbose)
\ No newline at end of file
+def _resolve_dicomdir(config, logger):
+    dicomdir = (config or {}).get("dicomdir")
+    if dicomdir:
+        path = Path(dicomdir)
+        if path.exists():
+            logger.info(f"Using dicomdir from config: {path}")
+            return path
+        logger.warning(f"dicomdir in config not found: {path}")
+    return None
@@ -1,15 +1,19 @@
 """slicetime - Slice timing correction using FSL slicetimer."""
 
+import os
 import subprocess
+from functools import partial
 from pathlib import Path
 from typing import Optional
 import nibabel as nib
-from bids7t.core import Session, setup_logging, find_files
+import numpy as np
+from bids7t.core import Session, setup_logging, find_files, run_parallel
 
 
 def run_slicetime(studydir: Path, subject: str, session: Optional[str] = None,
                   slice_order: str = "down", slice_direction: int = 3,
-                  force: bool = False, verbose: bool = False) -> None:
+                  force: bool = False, verbose: bool = False,
+                  jobs: Optional[int] = None) -> None:
     sess = Session(studydir, subject, session)
     log_file = sess.paths["logs"] / "slicetime.log"
     logger = setup_logging("slicetime", log_file, verbose)
@@ -21,40 +25,60 @@ def run_slicetime(studydir: Path, subject: str, session: Optional[str] = None,
     bolds = find_files(func_dir, "*_bold.nii.gz")
     if not bolds:
         logger.warning("No BOLD files found"); return
-    processed = 0
-    for bold in bolds:
-        meta = sess.get_json(bold)
-        if "RepetitionTime" not in meta:
-            continue
-        tr = meta["RepetitionTime"]
-        if "SliceTiming" in meta and not force:
-            continue
-        logger.info(f"Processing {bold.name} (TR={tr}s)")
-        tmp = bold.with_name(bold.stem + "_st_tmp.nii.gz")
-        cmd = ["slicetimer", "-i", str(bold), "-o", str(tmp), "-r", str(tr), "-d", str(slice_direction)]
-        if slice_order == "down": cmd.append("--down")
-        elif slice_order == "odd": cmd.append("--odd")
-        try:
-            subprocess.run(cmd, capture_output=True, text=True, check=True)
-        except subprocess.CalledProcessError as e:
-            logger.error(f"slicetimer failed: {e.stderr}")
-            if tmp.exists(): tmp.unlink()
-            continue
-        sess.make_writable(bold)
-        tmp.replace(bold)
-        if "SliceTiming" not in meta:
-            n_slices = nib.load(bold).shape[2]
-            if slice_order == "up":
-                st = [(i * tr) / n_slices for i in range(n_slices)]
-            elif slice_order == "down":
-                st = [((n_slices - 1 - i) * tr) / n_slices for i in range(n_slices)]
-            else:
-                st = [(i * tr) / n_slices for i in range(n_slices)]
-            json_f = bold.with_suffix("").with_suffix(".json")
-            sess.make_writable(json_f)
-            meta["SliceTiming"] = st
-            sess.write_json(bold, meta)
-            sess.make_readonly(json_f)
-        sess.make_readonly(bold)
-        processed += 1
-    logger.info(f"Processed {processed} files.")
\ No newline at end of file
+    # slicetimer is single-threaded; run one process per BOLD file. each holds
+    # a full 4D float volume, so the worker count stays small (--jobs)
+    processed = sum(run_parallel(
+        partial(_correct_slicetiming, sess=sess, slice_order=slice_order,
+                slice_direction=slice_direction, force=force, logger=logger),
+        bolds, max_workers=jobs,
+    ))
+    logger.info(f"Processed {processed} files.")
+
+
+def _correct_slicetiming(bold, sess, slice_order, slice_direction, force, logger) -> bool:
+    meta = sess.get_json(bold)
+    if "RepetitionTime" not in meta:
+        return False
+    tr = meta["RepetitionTime"]
+    if "SliceTiming" in meta and not force:
+        return False
+    logger.info(f"Processing {bold.name} (TR={tr}s)")
+    # header block only; the slice count sizes the order file and SliceTiming
+    with nib.openers.ImageOpener(bold) as f:
+        n_slices = nib.Nifti1Header.from_fileobj(f).get_data_shape()[slice_direction - 1]
+    # one acquisition order drives both the correction and the sidecar
+    order = _slice_order(n_slices, slice_order)
+    tmp = bold.with_name(bold.stem + "_st_tmp.nii.gz")
+    order_file = bold.with_name(bold.name[:-7] + "_st_order.txt")
+    np.savetxt(order_file, order + 1, fmt="%d")
+    cmd = ["slicetimer", "-i", str(bold), "-o", str(tmp), "-r", str(tr), "-d", str(slice_direction),
+           f"--ocustom={order_file}"]
+    try:
+        subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=True)
+    except subprocess.CalledProcessError as e:
+        logger.error(f"slicetimer failed: {e.stderr}")
+        if tmp.exists(): tmp.unlink()
+        return False
+    finally:
+        order_file.unlink(missing_ok=True)
+    # renaming over bold needs no write permission on it; lock the new file first
+    sess.make_readonly(tmp)
+    tmp.replace(bold)
+    if "SliceTiming" not in meta:
+        times = np.empty(n_slices)
+        times[order] = np.arange(n_slices) * tr / n_slices
+        meta["SliceTiming"] = times.tolist()
+        sess.write_json(bold, meta, readonly=True)
+    return True
+
+
+def _slice_order(n_slices, slice_order):
+    # 0-based slice indices in acquisition order (slicetimer --ocustom is 1-based)
+    if slice_order == "down":
+        return np.arange(n_slices)[::-1]
+    if slice_order == "odd":
+        # 1, 3, 5, ... (1-based) first, then 2, 4, ... as slicetimer --odd
+        return np.concatenate([np.arange(0, n_slices, 2), np.arange(1, n_slices, 2)])
+    if slice_order == "even":
+        return np.concatenate([np.arange(1, n_slices, 2), np.arange(0, n_slices, 2)])
+    return np.arange(n_slices)
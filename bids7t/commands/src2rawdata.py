@@ -8,19 +8,28 @@ Supports --config to use an alternative config file (e.g. for pilot
 sessions with different scan protocols).
 """
 
+import os
 import re
 import json
+import logging
+import shlex
 import shutil
 import subprocess
 from pathlib import Path
 from collections import defaultdict
+from contextlib import suppress
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, List, Dict, Any
 
 import pydicom
 
-from bids7t.core import Session, setup_logging, check_outputs_exist, load_config, get_series_mapping
+from bids7t.core import (
+    Session, setup_logging, check_outputs_exist, is_nonempty_dir, load_config, get_series_mapping,
+)
 from bids7t.core.bids_naming import BIDS_ENTITY_ORDER
 
+_TASK_RE = re.compile(r"_task-([^_]+)_")
+
 
 def run_src2rawdata(
     studydir: Path,
@@ -28,7 +37,8 @@ def run_src2rawdata(
     session: Optional[str] = None,
     config_path: Optional[Path] = None,
     force: bool = False,
-    verbose: bool = False
+    verbose: bool = False,
+    config: Optional[Dict[str, Any]] = None
 ) -> List[Path]:
     """
     Convert sourcedata to BIDS rawdata using dcm2niix directly.
@@ -47,6 +57,9 @@ def run_src2rawdata(
         Force overwrite existing files
     verbose : bool
         Enable verbose output
+    config : dict or None
+        Already-loaded study config (e.g. from run-all). If None, it is
+        loaded from ``config_path`` / code/bids7t.yaml.
         
     Returns
     -------
@@ -61,7 +74,8 @@ def run_src2rawdata(
     logger.info(f"Starting conversion for sub-{subject}{session_label}")
     
     # load series mapping — config_path overrides default code/bids7t.yaml
-    config = load_config(studydir, config_path=config_path)
+    if config is None:
+        config = load_config(studydir, config_path=config_path)
     series_rules = get_series_mapping(studydir, config)
     
     if not series_rules:
@@ -74,7 +88,7 @@ def run_src2rawdata(
     
     # check sourcedata exists
     sourcedata = sess.paths["sourcedata"]
-    if not sourcedata.exists() or not any(sourcedata.iterdir()):
+    if not is_nonempty_dir(sourcedata):
         raise FileNotFoundError(
             f"Sourcedata not found or empty: {sourcedata}\n"
             f"Run 'bids7t dcm2src' first."
@@ -83,11 +97,12 @@ def run_src2rawdata(
     # check existing output
     rawdata = sess.paths["rawdata"]
     if rawdata.exists():
-        existing_niftis = list(rawdata.rglob("*.nii.gz"))
-        if existing_niftis:
-            should_run, _ = check_outputs_exist(existing_niftis[:1], logger, force)
+        # stop at the first NIfTI; the full listing is only needed when skipping
+        first_nifti = next(rawdata.rglob("*.nii.gz"), None)
+        if first_nifti is not None:
+            should_run, _ = check_outputs_exist([first_nifti], logger, force)
             if not should_run:
-                return existing_niftis
+                return list(rawdata.rglob("*.nii.gz"))
             if force:
                 logger.info(f"Removing existing rawdata: {rawdata}")
                 shutil.rmtree(rawdata)
@@ -95,10 +110,11 @@ def run_src2rawdata(
     sess.ensure_directories("rawdata", "logs")
     
     # get all series directories
-    series_dirs = sorted([
-        d for d in sourcedata.iterdir()
-        if d.is_dir() and not d.name.startswith(".")
-    ])
+    with os.scandir(sourcedata) as it:
+        series_dirs = sorted(
+            Path(e.path) for e in it
+            if e.is_dir() and not e.name.startswith(".")
+        )
     
     logger.info(f"Found {len(series_dirs)} series directories in sourcedata")
     
@@ -107,6 +123,7 @@ def run_src2rawdata(
     converted_count = 0
     skipped_dirs = []
     
+    jobs = []
     for series_dir in series_dirs:
         rule = _match_series(series_dir, series_rules, logger)
         
@@ -114,30 +131,46 @@ def run_src2rawdata(
             skipped_dirs.append(series_dir.name)
             continue
         
-        # determine run number
+        # determine run number (assigned in sorted order, before conversion)
         run_key = _run_key(rule)
         run_counters[run_key] += 1
-        run_num = run_counters[run_key]
-        
-        # convert
-        created = _convert_series(
-            series_dir=series_dir,
-            rule=rule,
-            sess=sess,
-            run_num=run_num,
-            logger=logger
-        )
-        
-        if created:
-            converted_count += len(created)
+        jobs.append((series_dir, rule, run_counters[run_key]))
+    
+    # convert. series with distinct output names are independent dcm2niix
+    # processes and run concurrently. a rule that pins entities.run gives
+    # several series the same name; those run one after another in a single
+    # worker so dcm2niix can add its a/b suffixes and each output scan only
+    # sees finished files. scans.tsv is updated afterwards in series order
+    # to avoid concurrent read-modify-write of the TSV
+    groups: Dict[tuple, List[int]] = defaultdict(list)
+    for i, (series_dir, rule, run_num) in enumerate(jobs):
+        name = _build_bids_name(sess.subses_prefix, rule, run_num)
+        groups[(rule["target"], name)].append(i)
+    
+    def convert_group(indices):
+        return [
+            (i, _convert_series(series_dir=jobs[i][0], rule=jobs[i][1], sess=sess,
+                                run_num=jobs[i][2], logger=logger))
+            for i in indices
+        ]
+    
+    results = [None] * len(jobs)
+    max_workers = max(1, min(len(groups), os.cpu_count() or 1))
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for done in pool.map(convert_group, groups.values()):
+            for i, result in done:
+                results[i] = result
+    
+    all_scans_rows = []
+    for created, scans_rows in results:
+        converted_count += len(created)
+        all_scans_rows.extend(scans_rows)
+    sess.add_many_to_scans_tsv(all_scans_rows)
     
     if skipped_dirs:
         logger.info(f"Skipped {len(skipped_dirs)} unmatched series:")
-        for name in skipped_dirs:
-            logger.debug(f"  - {name}")
-    
-    # post-conversion cleanup
-    _remove_adc_files(sess, logger)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("%s", "\n".join(f"  - {name}" for name in skipped_dirs))
     
     # post-conversion metadata
     _update_participants_tsv(sess, logger)
@@ -168,7 +201,7 @@ def _match_series(series_dir: Path, rules: List[Dict], logger) -> Optional[Dict]
             if not _check_dicom_fields(series_dir, match_spec["dicom_field"]):
                 continue
         rule_name = rule.get("name", rule["suffix"])
-        logger.debug(f"Matched: {dirname} -> {rule_name}")
+        logger.debug("Matched: %s -> %s", dirname, rule_name)
         return rule
     return None
 
@@ -200,14 +233,22 @@ def _check_dicom_fields(series_dir: Path, field_checks: Dict[str, str]) -> bool:
         return False
 
 
-def _get_first_dicom(series_dir: Path) -> Optional[Path]:
-    dcm_files = list(series_dir.glob("*.dcm")) + list(series_dir.glob("*.DCM"))
-    if dcm_files:
-        return sorted(dcm_files)[0]
-    for f in sorted(series_dir.iterdir()):
-        if f.is_file() and not f.name.startswith("."):
-            return f
-    return None
+def _get_first_dicom(series_dir: Path, dcm_only: bool = False) -> Optional[Path]:
+    # first *.dcm/*.DCM by name, else (unless dcm_only) the first visible file.
+    # one scandir answers both instead of two globs plus an iterdir
+    first_dcm = first_other = None
+    with os.scandir(series_dir) as it:
+        for entry in it:
+            name = entry.name
+            if name.startswith("."):
+                continue
+            if name.lower().endswith(".dcm"):
+                if first_dcm is None or name < first_dcm:
+                    first_dcm = name
+            elif not dcm_only and (first_other is None or name < first_other) and entry.is_file():
+                first_other = name
+    name = first_dcm or first_other
+    return series_dir / name if name else None
 
 
 def _run_key(rule: Dict) -> str:
@@ -244,43 +285,69 @@ def _convert_series(series_dir, rule, sess, run_num, logger):
         "dcm2niix", "-b", "y", "-z", "y", "-f", bids_name,
         "-o", str(output_dir), *extra_flags, str(series_dir)
     ]
-    logger.debug(f"  cmd: {' '.join(cmd)}")
-    result = subprocess.run(cmd, capture_output=True, text=True)
+    # stdout is only shown at debug level, so don't buffer it otherwise
+    debug = logger.isEnabledFor(logging.DEBUG)
+    if debug:
+        logger.debug("  cmd: %s", shlex.join(cmd))
+    result = subprocess.run(
+        cmd, stdout=subprocess.PIPE if debug else subprocess.DEVNULL,
+        stderr=subprocess.PIPE
+    )
+    # output is kept as bytes; only the part that gets logged is decoded
     if result.returncode != 0:
-        logger.warning(f"dcm2niix returned code {result.returncode} for {series_dir.name}")
+        msg = f"dcm2niix returned code {result.returncode} for {series_dir.name}"
         if result.stderr:
-            logger.warning(f"  stderr: {result.stderr[:200]}")
-    if result.stdout and logger.level <= 10:
-        for line in result.stdout.splitlines()[:10]:
-            logger.debug(f"  dcm2niix: {line}")
-    created_niftis = sorted(output_dir.glob(f"{bids_name}*.nii.gz"))
-    created_jsons = sorted(output_dir.glob(f"{bids_name}*.json"))
+            msg += f"\n  stderr: {result.stderr[:200].decode(errors='replace')}"
+        logger.warning(msg)
+    if debug and result.stdout:
+        logger.debug("%s", "\n".join(
+            f"  dcm2niix: {line.decode(errors='replace')}"
+            for line in result.stdout.splitlines()[:10]))
+    # one listing of the output dir serves both the NIfTI and JSON lookups
+    with os.scandir(output_dir) as it:
+        names = sorted(e.name for e in it)
+    if target == "dwi":
+        # dcm2niix's derived ADC maps are not raw data; drop them as they appear
+        adc_names = [n for n in names if n.startswith(bids_name) and "_ADC" in n]
+        for name in adc_names:
+            logger.info(f"Removing ADC file: {name}")
+            with suppress(FileNotFoundError):
+                os.unlink(output_dir / name)
+        if adc_names:
+            names = [n for n in names if n not in adc_names]
+    created_niftis = [output_dir / n for n in names
+                      if n.startswith(bids_name) and n.endswith(".nii.gz")]
+    created_jsons = [output_dir / n for n in names
+                     if n.startswith(bids_name) and n.endswith(".json")]
     if not created_niftis:
         logger.warning(f"No NIfTI files created for {series_dir.name}")
-        all_new = sorted(output_dir.glob(f"*.nii.gz"))
-        if all_new:
-            logger.warning(f"  Found {len(all_new)} total NIfTI files in {target}/")
-        return []
+        n_total = sum(1 for n in names if n.endswith(".nii.gz"))
+        if n_total:
+            logger.warning(f"  Found {n_total} total NIfTI files in {target}/")
+        return [], []
     logger.info(f"  Created {len(created_niftis)} NIfTI + {len(created_jsons)} JSON")
+    # sidecars are parsed once here; acq_time for scans.tsv comes from the
+    # same dict instead of re-reading the JSON later
+    metas = {}
     for json_file in created_jsons:
         try:
             with open(json_file) as f:
                 meta = json.load(f)
             meta["SkullStripped"] = False
             with open(json_file, "w") as f:
-                json.dump(meta, f, indent=4)
+                f.write(json.dumps(meta, indent=4))
+            metas[json_file.name[:-5]] = meta
         except Exception:
             pass
-    for nii_file in created_niftis:
-        rel_path = f"{target}/{nii_file.name}"
-        acq_time = _get_acq_time(nii_file, sess)
-        sess.add_to_scans_tsv(rel_path, acq_time=acq_time)
-    return created_niftis + created_jsons
+    scans_rows = [
+        (f"{target}/{nii_file.name}", _get_acq_time(metas.get(nii_file.name[:-7], {})))
+        for nii_file in created_niftis
+    ]
+    return created_niftis + created_jsons, scans_rows
 
 
-def _get_acq_time(nii_file, sess):
+def _get_acq_time(meta):
     try:
-        meta = sess.get_json(nii_file)
         if "AcquisitionDateTime" in meta:
             return meta["AcquisitionDateTime"]
         if "AcquisitionDate" in meta and "AcquisitionTime" in meta:
@@ -301,17 +368,6 @@ def _get_acq_time(nii_file, sess):
     return "n/a"
 
 
-def _remove_adc_files(sess, logger):
-    dwi_dir = sess.paths["dwi"]
-    if not dwi_dir.exists():
-        return
-    for adc_file in sorted(dwi_dir.glob("*_ADC*")):
-        logger.info(f"Removing ADC file: {adc_file.name}")
-        if adc_file.suffix == ".gz" or adc_file.name.endswith(".nii.gz"):
-            sess.remove_from_scans_tsv(f"dwi/{adc_file.name}")
-        adc_file.unlink()
-
-
 def _update_participants_tsv(sess, logger):
     rawdata_root = sess.paths["rawdata_root"]
     ptsv = rawdata_root / "participants.tsv"
@@ -328,7 +384,7 @@ def _update_participants_tsv(sess, logger):
                     existing_ids.add(parts[0])
                     rows.append(line)
     if participant_id in existing_ids:
-        logger.debug(f"Participant {participant_id} already in participants.tsv")
+        logger.debug("Participant %s already in participants.tsv", participant_id)
         return
     age, sex = _read_participant_info(sess, logger)
     new_row = f"{participant_id}\t{age}\t{sex}\tcontrol"
@@ -346,9 +402,8 @@ def _read_participant_info(sess, logger):
     for series_dir in sorted(sourcedata.iterdir()):
         if not series_dir.is_dir():
             continue
-        dcm_files = list(series_dir.glob("*.dcm")) + list(series_dir.glob("*.DCM"))
-        if dcm_files:
-            dcm_file = sorted(dcm_files)[0]
+        dcm_file = _get_first_dicom(series_dir, dcm_only=True)
+        if dcm_file is not None:
             break
     if dcm_file is None:
         return "n/a", "n/a"
@@ -367,7 +422,7 @@ def _read_participant_info(sess, logger):
                 sex_str = "n/a"
         return age_str, sex_str
     except Exception as e:
-        logger.debug(f"Could not read participant info from DICOM: {e}")
+        logger.debug("Could not read participant info from DICOM: %s", e)
         return "n/a", "n/a"
 
 
@@ -386,12 +441,14 @@ def _create_task_jsons(sess, logger):
     func_dir = sess.paths["func"]
     if not func_dir.exists():
         return
-    import re
     tasks = set()
-    for bold_file in func_dir.glob("*_bold.nii.gz"):
-        m = re.search(r"_task-([^_]+)_", bold_file.name)
-        if m:
-            tasks.add(m.group(1))
+    with os.scandir(func_dir) as it:
+        for entry in it:
+            if not entry.name.endswith("_bold.nii.gz"):
+                continue
+            m = _TASK_RE.search(entry.name)
+            if m:
+                tasks.add(m.group(1))
     for task in sorted(tasks):
         task_json = rawdata_root / f"task-{task}_bold.json"
         if task_json.exists():
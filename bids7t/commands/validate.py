@@ -1,20 +1,61 @@
 """validate - Run BIDS validator."""
 
+import os
+import shutil
 import subprocess
 from pathlib import Path
 from typing import Optional
-from bids7t.core import Session, setup_logging, get_docker_user_args
+from bids7t.core import Session, setup_logging, get_docker_user_args, ensure_docker_image
+
+VALIDATOR_IMAGE = "bids/validator:latest"
+
+
+class DockerValidator:
+    """
+    One long-running validator container, reused by run_validate calls.
+
+    Use as a context manager around a loop over sessions; each validation
+    is then a ``docker exec`` instead of a container start and teardown.
+    """
+
+    def __init__(self, studydir: Path, logger):
+        self.rawdata_root = Path(studydir) / "rawdata"
+        self.name = f"bids7t_validator_{os.getpid()}"
+        self.logger = logger
+        self.started = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        if self.started:
+            subprocess.run(["docker", "rm", "-f", self.name],
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            self.started = False
+        return False
+
+    def command(self):
+        # started on first use, once rawdata exists to be mounted
+        if not self.started:
+            ensure_docker_image(VALIDATOR_IMAGE, self.logger)
+            subprocess.run(["docker", "run", "-d", "--rm", "--pull=never", *get_docker_user_args(),
+                            "--name", self.name, "--volume", f"{self.rawdata_root}:/data:ro",
+                            "--entrypoint", "sleep", VALIDATOR_IMAGE, "infinity"],
+                           stdout=subprocess.DEVNULL, check=True)
+            self.started = True
+        return ["docker", "exec", self.name, "bids-validator", "/data"]
 
 
 def run_validate(studydir: Path, subject: str, session: Optional[str] = None,
-                 force: bool = False, verbose: bool = False) -> bool:
+                 force: bool = False, verbose: bool = False,
+                 validator: Optional[DockerValidator] = None) -> bool:
     sess = Session(studydir, subject, session)
     log_file = sess.paths["logs"] / "validate.log"
     if log_file.exists() and not force:
         logger = setup_logging("validate", log_file=None, verbose=verbose)
-        with open(log_file) as f:
-            content = f.read()
-        passed = "BIDS compatible" in content
+        # stop at the marker rather than reading the whole log
+        with open(log_file, "rb") as f:
+            passed = any(b"BIDS compatible" in line for line in f)
         logger.info(f"Previous validation: {'PASSED' if passed else 'FAILED'}")
         return passed
     logger = setup_logging("validate", log_file, verbose)
@@ -22,9 +63,17 @@ def run_validate(studydir: Path, subject: str, session: Optional[str] = None,
     if not rawdata_root.exists():
         logger.error("rawdata not found"); return False
     logger.info(f"Running BIDS Validator on {rawdata_root}")
-    user_args = get_docker_user_args()
-    cmd = ["docker", "run", "--rm", *user_args,
-           "--volume", f"{rawdata_root}:/data:ro", "bids/validator", "/data"]
+    # a locally installed validator skips docker startup entirely
+    local_validator = shutil.which("bids-validator")
+    if local_validator:
+        cmd = [local_validator, str(rawdata_root)]
+    elif validator is not None:
+        cmd = validator.command()
+    else:
+        user_args = get_docker_user_args()
+        ensure_docker_image(VALIDATOR_IMAGE, logger)
+        cmd = ["docker", "run", "--rm", "--pull=never", *user_args,
+               "--volume", f"{rawdata_root}:/data:ro", VALIDATOR_IMAGE, "/data"]
     sess.paths["logs"].mkdir(parents=True, exist_ok=True)
     with open(log_file, "w") as logf:
         result = subprocess.run(cmd, stdout=logf, stderr=subprocess.STDOUT)
@@ -1,7 +1,10 @@
 """Core module for bids7t."""
 
 from .session import Session, load_config, get_series_mapping, load_mp2rage_params, detect_sessions
-from .utils import setup_logging, run_command, check_outputs_exist, find_files, get_docker_user_args
+from .utils import (
+    setup_logging, run_command, check_outputs_exist, find_files, json_sidecar, is_nonempty_dir,
+    get_docker_user_args, ensure_docker_image, save_nifti, run_parallel,
+)
 from .config import (
     resolve_studydir,
     load_study_config,
@@ -33,7 +36,12 @@ __all__ = [
     "run_command",
     "check_outputs_exist",
     "find_files",
+    "json_sidecar",
+    "is_nonempty_dir",
     "get_docker_user_args",
+    "ensure_docker_image",
+    "save_nifti",
+    "run_parallel",
     # Config
     "resolve_studydir",
     "load_study_config",
@@ -3,20 +3,37 @@ Searches for code/bids7t.yaml starting from the current working directory
 and traversing upward.
 """
 
+import os
 import yaml
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
 
 MAX_SEARCH_DEPTH = 5
 _CONFIG_FILENAME = "bids7t.yaml"
 
+# libyaml's C parser when pyyaml was built with it; same safe semantics
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# (cwd, max_depth) -> config path found by the upward search. only hits are
+# cached, so a config created later in the same process (init) is still found
+_CONFIG_PATH_CACHE: Dict[Tuple[str, int], Path] = {}
+
+# (config path, mtime_ns) -> parsed config, so repeated loads in one process
+# (status, run-all) parse the YAML once. edits to the file invalidate by mtime
+_STUDY_CONFIG_CACHE: Dict[Tuple[str, int], Dict[str, Any]] = {}
+
 
 def find_config_from_cwd(max_depth: int = MAX_SEARCH_DEPTH) -> Optional[Path]:
     # searches for code/bids7t.yaml from CWD upward
-    current = Path.cwd().resolve()
+    key = (os.getcwd(), max_depth)
+    cached = _CONFIG_PATH_CACHE.get(key)
+    if cached is not None:
+        return cached
+    current = Path(key[0]).resolve()
     for _ in range(max_depth):
         config_path = current / "code" / _CONFIG_FILENAME
         if config_path.exists():
+            _CONFIG_PATH_CACHE[key] = config_path
             return config_path
         parent = current.parent
         if parent == current:
@@ -44,13 +61,20 @@ def load_study_config(config_path: Optional[Path] = None) -> Dict[str, Any]:
             "or use '--studydir /path/to/study' with your command."
         )
     config_path = Path(config_path)
-    if not config_path.exists():
-        raise FileNotFoundError(f"Config file not found: {config_path}")
     try:
-        with open(config_path) as f:
-            return yaml.safe_load(f) or {}
-    except yaml.YAMLError as e:
-        raise ValueError(f"Invalid YAML in {config_path}: {e}")
+        key = (str(config_path), config_path.stat().st_mtime_ns)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Config file not found: {config_path}")
+    cached = _STUDY_CONFIG_CACHE.get(key)
+    if cached is None:
+        try:
+            with open(config_path) as f:
+                cached = yaml.load(f, Loader=_YAML_LOADER) or {}
+        except yaml.YAMLError as e:
+            raise ValueError(f"Invalid YAML in {config_path}: {e}")
+        _STUDY_CONFIG_CACHE[key] = cached
+    # shallow copy so callers can add/override keys without touching the cache
+    return dict(cached)
 
 
 def get_studydir(config_path: Optional[Path] = None) -> Path:
@@ -80,6 +104,8 @@ def resolve_studydir(explicit_studydir: Optional[Path] = None) -> Path:
         path = Path(explicit_studydir)
         if not path.exists():
             raise click.UsageError(f"Studydir does not exist: {path}")
+        if not path.is_dir():
+            raise click.UsageError(f"Studydir is not a directory: {path}")
         return path
     try:
         return get_studydir()
@@ -3,14 +3,20 @@ Session class for managing subject/session paths and file operations.
 Config loading from code/bids7t.yaml (single file for everything).
 """
 
+import os
 from pathlib import Path
+from functools import cached_property, lru_cache, wraps
+from contextlib import contextmanager, suppress
 import json
 import yaml
 import logging
 import stat
 import csv
-from typing import Optional, Dict, Any, List
+import fnmatch
+import threading
+from typing import Optional, Dict, Any, List, Iterable
 
+from bids7t.core.utils import json_sidecar
 from bids7t.core.bids_naming import (
     parse_bids_name,
     build_bids_name,
@@ -20,11 +26,46 @@ from bids7t.core.bids_naming import (
     has_dcm2niix_suffix,
     entities_match,
 )
+from bids7t.core.config import load_study_config, _YAML_LOADER
 
 logger = logging.getLogger(__name__)
 
 _CONFIG_FILENAME = "bids7t.yaml"
 
+# (mp2rage.yaml path, mtime_ns) -> validated params, so batch runs over many
+# subjects parse and check the file once. edits invalidate by mtime
+_MP2RAGE_CACHE: Dict[tuple, Dict[str, Any]] = {}
+
+
+def _open_for_write(path: Path, mode: str = "w", **kwargs):
+    # open, creating the parent directory only if the first attempt says it
+    # is missing; the usual case (parent exists) costs no mkdir at all
+    try:
+        return open(path, mode, **kwargs)
+    except FileNotFoundError:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        return open(path, mode, **kwargs)
+
+
+@lru_cache(maxsize=4096)
+def _json_path_for(path) -> Path:
+    # sidecar path for a NIfTI (anything else passes through); the same
+    # images are looked up repeatedly by get_json/write_json
+    path = Path(path)
+    if path.name.endswith((".nii.gz", ".nii")):
+        return json_sidecar(path)
+    return path
+
+
+def _scans_locked(method):
+    # serialize scans.tsv read-modify-write cycles across threads sharing a
+    # Session (e.g. fixanat processing runs concurrently)
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._scans_lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
 
 class Session:
     """
@@ -32,6 +73,9 @@ class Session:
     When session is None, paths and prefixes omit the ses- level.
     """
     
+    # entities bids_name() emits, in order
+    _ENTITY_ORDER = ('task', 'acq', 'ce', 'rec', 'dir', 'run', 'echo', 'part', 'inv')
+    
     def __init__(self, studydir: Path, subject: str,
                  session: Optional[str] = None, dicom_dir: Optional[Path] = None):
         self.studydir = Path(studydir)
@@ -39,6 +83,13 @@ class Session:
         self.session = session
         self.dicom_dir = Path(dicom_dir) if dicom_dir else None
         self.has_session = session is not None
+        self._scans_lock = threading.RLock()
+        # scans_tsv_batch() nesting depth and its in-memory
+        # [fieldnames, rows, dirty] state
+        self._scans_batch_depth = 0
+        self._scans_batch = None
+        # last parse of scans.tsv outside a batch: ((mtime_ns, size), fieldnames, rows)
+        self._scans_cache = None
         
         self.sub_prefix = f"sub-{subject}"
         if self.has_session:
@@ -47,29 +98,32 @@ class Session:
         else:
             self.ses_prefix = None
             self.subses_prefix = f"sub-{subject}"
-        
-        self.paths = self._init_paths()
+        # bids_name() concatenates onto this instead of joining the prefix in
+        self._subses_prefix_us = self.subses_prefix + "_"
     
-    def _init_paths(self) -> Dict[str, Path]:
+    @cached_property
+    def paths(self) -> Dict[str, Path]:
+        # built on first use; Session objects are created by every command
         base = self.studydir
+        # each shared prefix is joined once and reused
+        raw_root = base / "rawdata"
+        derivatives = base / "derivatives"
+        rd = raw_sub = raw_root / self.sub_prefix
+        sd = base.joinpath("sourcedata", self.sub_prefix)
+        ld = derivatives.joinpath("logs", "bids7t", self.sub_prefix)
         if self.has_session:
-            rd = base / "rawdata" / self.sub_prefix / self.ses_prefix
-            sd = base / "sourcedata" / self.sub_prefix / self.ses_prefix
-            ld = base / "derivatives" / "logs" / "bids7t" / self.sub_prefix / self.ses_prefix
-        else:
-            rd = base / "rawdata" / self.sub_prefix
-            sd = base / "sourcedata" / self.sub_prefix
-            ld = base / "derivatives" / "logs" / "bids7t" / self.sub_prefix
+            rd, sd, ld = rd / self.ses_prefix, sd / self.ses_prefix, ld / self.ses_prefix
         return {
-            "rawdata": rd, "rawdata_subject": base / "rawdata" / self.sub_prefix,
-            "rawdata_root": base / "rawdata", "sourcedata": sd,
+            "rawdata": rd, "rawdata_subject": raw_sub,
+            "rawdata_root": raw_root, "sourcedata": sd,
             "anat": rd / "anat", "func": rd / "func", "fmap": rd / "fmap", "dwi": rd / "dwi",
-            "derivatives": base / "derivatives", "logs": ld, "code": base / "code",
+            "derivatives": derivatives, "logs": ld, "code": base / "code",
             "dicom": self.dicom_dir if self.dicom_dir else base / "dicom",
         }
     
-    @property
+    @cached_property
     def scans_tsv(self) -> Path:
+        # every scans.tsv operation goes through this; build the path once
         return self.paths["rawdata"] / f"{self.subses_prefix}_scans.tsv"
     
     def ensure_directories(self, *keys: str) -> None:
@@ -82,35 +136,79 @@ class Session:
     # --- file ops ---
     
     def get_json(self, path: Path) -> Dict[str, Any]:
-        jp = self._to_json_path(path)
-        if jp.exists():
-            with open(jp) as f:
+        try:
+            with open(self._to_json_path(path), "rb") as f:
                 return json.load(f)
-        return {}
+        except FileNotFoundError:
+            return {}
     
-    def write_json(self, path: Path, data: Dict[str, Any]) -> None:
+    def write_json(self, path: Path, data: Dict[str, Any], readonly: bool = False) -> None:
         jp = self._to_json_path(path)
-        jp.parent.mkdir(parents=True, exist_ok=True)
-        with open(jp, "w") as f:
-            json.dump(data, f, indent=4)
+        # dumps + one write: json.dump streams every token as its own write()
+        if not readonly:
+            with _open_for_write(jp) as f:
+                f.write(json.dumps(data, indent=4))
+            return
+        # write a sibling and rename it over the sidecar: no chmod round-trip
+        # on the (possibly read-only) target, and the result is read-only
+        try:
+            mode = stat.S_IMODE(os.stat(jp).st_mode)
+        except FileNotFoundError:
+            mode = 0o644
+        tmp = jp.with_name(f".{jp.name}.{os.getpid()}.{threading.get_ident()}")
+        try:
+            with _open_for_write(tmp) as f:
+                f.write(json.dumps(data, indent=4))
+                os.fchmod(f.fileno(), mode & ~stat.S_IWUSR)
+            os.replace(tmp, jp)
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
     
     def _to_json_path(self, path: Path) -> Path:
-        path = Path(path)
-        if path.suffix == ".gz":
-            return path.with_suffix("").with_suffix(".json")
-        elif path.suffix == ".nii":
-            return path.with_suffix(".json")
-        return path
+        return _json_path_for(path)
     
     def make_writable(self, path: Path) -> None:
-        path = Path(path)
-        if path.exists():
-            path.chmod(path.stat().st_mode | stat.S_IWUSR)
+        # one stat (no separate exists() probe); chmod only if the bit is missing
+        try:
+            mode = os.stat(path).st_mode
+        except FileNotFoundError:
+            return
+        if not mode & stat.S_IWUSR:
+            os.chmod(path, mode | stat.S_IWUSR)
     
     def make_readonly(self, path: Path) -> None:
-        path = Path(path)
-        if path.exists():
-            path.chmod(path.stat().st_mode & ~stat.S_IWUSR)
+        # one stat; chmod only if the owner-write bit is set
+        try:
+            mode = os.stat(path).st_mode
+        except FileNotFoundError:
+            return
+        if mode & stat.S_IWUSR:
+            os.chmod(path, mode & ~stat.S_IWUSR)
+    
+    @contextmanager
+    def writable_scope(self, *paths: Path):
+        """
+        Make existing ``paths`` owner-writable for the block, read-only after.
+
+        One stat per path up front, and files that are already writable
+        are not chmod-ed on entry. Missing paths are ignored.
+        """
+        modes = {}
+        for path in paths:
+            try:
+                mode = os.stat(path).st_mode
+            except FileNotFoundError:
+                continue
+            modes[path] = mode
+            if not mode & stat.S_IWUSR:
+                os.chmod(path, mode | stat.S_IWUSR)
+        try:
+            yield
+        finally:
+            for path, mode in modes.items():
+                with suppress(FileNotFoundError):
+                    os.chmod(path, mode & ~stat.S_IWUSR)
     
     def remove_file(self, path: Path) -> bool:
         path = Path(path)
@@ -122,24 +220,30 @@ class Session:
     def rename_file(self, src: Path, dst: Path) -> bool:
         src, dst = Path(src), Path(dst)
         if src.exists():
-            dst.parent.mkdir(parents=True, exist_ok=True)
-            src.rename(dst)
+            try:
+                src.rename(dst)
+            except FileNotFoundError:
+                dst.parent.mkdir(parents=True, exist_ok=True)
+                src.rename(dst)
             return True
         return False
     
     def bids_name(self, suffix: str, **entities) -> str:
-        parts = [self.subses_prefix]
-        for e in ['task', 'acq', 'ce', 'rec', 'dir', 'run', 'echo', 'part', 'inv']:
-            if e in entities:
-                v = entities[e]
-                if e == 'run' and isinstance(v, int):
-                    v = str(v)
-                parts.append(f"{e}-{v}")
-        parts.append(suffix)
-        return "_".join(parts)
+        # f-string formatting already turns an int run into its str form
+        middle = "_".join(f"{e}-{entities[e]}" for e in self._ENTITY_ORDER if e in entities)
+        return self._subses_prefix_us + (middle + "_" if middle else "") + suffix
+    
+    @cached_property
+    def _rawdata_prefix(self) -> str:
+        return str(self.paths["rawdata"]) + os.sep
     
     def rel_path(self, abs_path: Path) -> str:
-        return str(Path(abs_path).relative_to(self.paths["rawdata"]))
+        # plain prefix strip for paths under rawdata; relative_to only as the
+        # fallback (it also raises the usual ValueError for outside paths)
+        s = os.fspath(abs_path)
+        if s.startswith(self._rawdata_prefix):
+            return s[len(self._rawdata_prefix):]
+        return str(Path(s).relative_to(self.paths["rawdata"]))
     
     # ================================================================
     # BIDS name discovery
@@ -148,7 +252,8 @@ class Session:
     def find_by_suffix(self, modality: str, suffix: str,
                        entity_filter: Optional[Dict[str, str]] = None,
                        extension: str = '*.nii.gz',
-                       include_dcm2niix: bool = True) -> List[Path]:
+                       include_dcm2niix: bool = True,
+                       listing: Optional[Iterable[str]] = None) -> List[Path]:
         """
         Find files in a modality directory matching a BIDS suffix.
         
@@ -177,6 +282,10 @@ class Session:
             If True (default), also returns files with dcm2niix-appended
             suffixes (like _real, _e1a). If False, only returns clean
             BIDS names.
+        listing : iterable of str, optional
+            File names already read from the modality directory. When
+            given, these are filtered instead of re-reading the directory,
+            so callers doing several lookups can list it once.
         
         Returns
         -------
@@ -198,12 +307,22 @@ class Session:
             sess.find_by_suffix("func", "bold", {"task": "rest"})
         """
         mod_dir = self.paths.get(modality)
-        if mod_dir is None or not mod_dir.exists():
+        if mod_dir is None:
             return []
+        if listing is None:
+            # one scandir + fnmatch; Paths are only built for matches
+            try:
+                with os.scandir(mod_dir) as it:
+                    listing = [e.name for e in it]
+            except FileNotFoundError:
+                return []
+        # like glob, skip hidden names (in-progress temp outputs)
+        candidates = [n for n in fnmatch.filter(sorted(listing), extension)
+                      if not n.startswith(".")]
         
         results = []
-        for f in sorted(mod_dir.glob(extension)):
-            parsed = parse_bids_name(f.name)
+        for name in candidates:
+            parsed = parse_bids_name(name)
             
             if parsed['suffix'] != suffix:
                 continue
@@ -222,7 +341,7 @@ class Session:
                 if not match:
                     continue
             
-            results.append(f)
+            results.append(mod_dir / name)
         
         return results
     
@@ -334,23 +453,72 @@ class Session:
     
     # --- scans.tsv ---
     
+    @contextmanager
+    def scans_tsv_batch(self):
+        """
+        Defer scans.tsv writes until the outermost batch exits.
+        
+        Inside the block every scans.tsv method works on an in-memory copy
+        that is read once; it is written back once at the end (also on
+        error, so the table matches files already moved). Nests, and is
+        safe to share between threads using this Session.
+        """
+        with self._scans_lock:
+            self._scans_batch_depth += 1
+        try:
+            yield self
+        finally:
+            with self._scans_lock:
+                self._scans_batch_depth -= 1
+                state = self._scans_batch
+                if self._scans_batch_depth == 0 and state is not None:
+                    self._scans_batch = None
+                    if state[2]:
+                        self.write_scans_tsv(state[0], state[1])
+    
+    @_scans_locked
     def read_scans_tsv(self) -> tuple:
-        if not self.scans_tsv.exists():
+        if self._scans_batch_depth:
+            if self._scans_batch is None:
+                self._scans_batch = [*self._read_scans_file(), False]
+            fieldnames, rows, _ = self._scans_batch
+            return list(fieldnames), list(rows)
+        return self._read_scans_file()
+    
+    def _read_scans_file(self) -> tuple:
+        # re-parse only when the file changed on disk; callers get copies
+        # because they edit rows in place before writing them back
+        try:
+            st = os.stat(self.scans_tsv)
+        except FileNotFoundError:
+            self._scans_cache = None
             return ["filename", "acq_time"], []
-        with open(self.scans_tsv, newline="") as f:
-            reader = csv.DictReader(f, delimiter="\t")
-            fieldnames = reader.fieldnames or ["filename", "acq_time"]
-            rows = list(reader)
-        return list(fieldnames), rows
-    
+        key = (st.st_mtime_ns, st.st_size)
+        cache = self._scans_cache
+        if cache is None or cache[0] != key:
+            with open(self.scans_tsv, newline="") as f:
+                reader = csv.DictReader(f, delimiter="\t")
+                fieldnames = reader.fieldnames or ["filename", "acq_time"]
+                rows = list(reader)
+            cache = self._scans_cache = (key, list(fieldnames), rows)
+        return list(cache[1]), [dict(r) for r in cache[2]]
+    
+    @_scans_locked
     def write_scans_tsv(self, fieldnames: list, rows: list) -> None:
-        self.scans_tsv.parent.mkdir(parents=True, exist_ok=True)
-        with open(self.scans_tsv, "w", newline="") as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames, delimiter="\t",
-                                     extrasaction='ignore')
-            writer.writeheader()
-            writer.writerows(rows)
-    
+        if self._scans_batch_depth:
+            self._scans_batch = [list(fieldnames), list(rows), True]
+            return
+        # mtime may not tick between two quick same-size writes; never trust
+        # the cache across our own write
+        self._scans_cache = None
+        with _open_for_write(self.scans_tsv, newline="") as f:
+            # plain rows in column order; same output as DictWriter with
+            # extrasaction='ignore', without its per-cell key checks
+            writer = csv.writer(f, delimiter="\t")
+            writer.writerow(fieldnames)
+            writer.writerows([row.get(fn, "") for fn in fieldnames] for row in rows)
+    
+    @_scans_locked
     def add_to_scans_tsv(self, filename: str, acq_time: str = "n/a", **extra) -> None:
         fieldnames, rows = self.read_scans_tsv()
         for key in extra:
@@ -362,6 +530,23 @@ class Session:
         rows.append({"filename": filename, "acq_time": acq_time, **extra})
         self.write_scans_tsv(fieldnames, rows)
     
+    @_scans_locked
+    def add_many_to_scans_tsv(self, entries: list) -> int:
+        """Add (filename, acq_time) rows with one read and one write. Returns count added."""
+        fieldnames, rows = self.read_scans_tsv()
+        existing = {r.get("filename") for r in rows}
+        added = 0
+        for filename, acq_time in entries:
+            if filename in existing:
+                continue
+            rows.append({"filename": filename, "acq_time": acq_time})
+            existing.add(filename)
+            added += 1
+        if added:
+            self.write_scans_tsv(fieldnames, rows)
+        return added
+    
+    @_scans_locked
     def remove_from_scans_tsv(self, filename: str) -> bool:
         fieldnames, rows = self.read_scans_tsv()
         new_rows = [r for r in rows if r.get("filename") != filename]
@@ -370,6 +555,7 @@ class Session:
             return True
         return False
     
+    @_scans_locked
     def rename_in_scans_tsv(self, old_filename: str, new_filename: str) -> bool:
         fieldnames, rows = self.read_scans_tsv()
         for row in rows:
@@ -379,6 +565,7 @@ class Session:
                 return True
         return False
     
+    @_scans_locked
     def replace_in_scans_tsv(self, old_filename: str, new_filenames: list) -> bool:
         fieldnames, rows = self.read_scans_tsv()
         old_idx, old_entry = None, None
@@ -397,6 +584,7 @@ class Session:
         self.write_scans_tsv(fieldnames, rows)
         return True
     
+    @_scans_locked
     def get_scans_entry(self, filename: str) -> Optional[Dict]:
         _, rows = self.read_scans_tsv()
         for row in rows:
@@ -404,26 +592,51 @@ class Session:
                 return row.copy()
         return None
     
+    @_scans_locked
     def sync_scans_tsv(self, remove_missing: bool = True, add_new: bool = False) -> dict:
         fieldnames, rows = self.read_scans_tsv()
         rawdata = self.paths["rawdata"]
         removed, added = [], []
+        modalities = ["anat", "func", "fmap", "dwi"]
+        
+        def scan(mod):
+            try:
+                with os.scandir(rawdata / mod) as it:
+                    return {e.name for e in it}
+            except (FileNotFoundError, NotADirectoryError):
+                return set()
+        
+        # one scandir per modality dir answers every presence check below
+        needed = set(modalities) if add_new else set()
+        if remove_missing:
+            for row in rows:
+                mod, sep, name = row.get("filename", "").partition("/")
+                if sep and "/" not in name:
+                    needed.add(mod)
+        listings = {mod: scan(mod) for mod in needed}
+        names_in = listings.__getitem__
+        
         if remove_missing:
             new_rows = []
             for row in rows:
-                if (rawdata / row.get("filename", "")).exists():
+                filename = row.get("filename", "")
+                mod, sep, name = filename.partition("/")
+                if sep and "/" not in name:
+                    present = name in names_in(mod)
+                else:
+                    present = (rawdata / filename).exists()
+                if present:
                     new_rows.append(row)
                 else:
                     removed.append(row.get("filename"))
             rows = new_rows
         if add_new:
             existing = {r.get("filename") for r in rows}
-            for mod in ["anat", "func", "fmap", "dwi"]:
-                md = rawdata / mod
-                if not md.exists():
-                    continue
-                for nii in md.glob("*.nii.gz"):
-                    rel = f"{mod}/{nii.name}"
+            for mod in modalities:
+                for name in sorted(names_in(mod)):
+                    if name.startswith(".") or not name.endswith(".nii.gz"):
+                        continue
+                    rel = f"{mod}/{name}"
                     if rel not in existing:
                         rows.append({"filename": rel, "acq_time": "n/a"})
                         added.append(rel)
@@ -458,19 +671,21 @@ def load_config(studydir: Path,
     """
     if config_path is not None:
         config_path = Path(config_path)
-        if not config_path.exists():
-            logger.error(f"Config file not found: {config_path}")
+        try:
+            config = load_study_config(config_path)
+        except FileNotFoundError:
+            logger.error("Config file not found: %s", config_path)
             return {}
-        logger.info(f"Using config: {config_path}")
-        with open(config_path) as f:
-            return yaml.safe_load(f) or {}
+        logger.info("Using config: %s", config_path)
+        return config
 
     default_path = Path(studydir) / "code" / _CONFIG_FILENAME
-    if not default_path.exists():
-        logger.warning(f"No {_CONFIG_FILENAME} found at {default_path}")
+    # parsed once per (path, mtime) across subjects/sessions in one process
+    try:
+        return load_study_config(default_path)
+    except FileNotFoundError:
+        logger.warning("No %s found at %s", _CONFIG_FILENAME, default_path)
         return {}
-    with open(default_path) as f:
-        return yaml.safe_load(f) or {}
 
 
 def get_series_mapping(studydir: Path, config: Optional[Dict] = None,
@@ -492,25 +707,31 @@ def load_mp2rage_params(studydir: Path) -> Optional[Dict[str, Any]]:
     scanner-specific acquisition parameters, not pipeline config.
     """
     mp2rage_path = Path(studydir) / "code" / "mp2rage.yaml"
-    if not mp2rage_path.exists():
-        logger.warning(f"No mp2rage.yaml found at {mp2rage_path}")
+    try:
+        cache_key = (str(mp2rage_path), mp2rage_path.stat().st_mtime_ns)
+    except FileNotFoundError:
+        logger.warning("No mp2rage.yaml found at %s", mp2rage_path)
         return None
+    cached = _MP2RAGE_CACHE.get(cache_key)
+    if cached is not None:
+        return dict(cached)
     try:
         with open(mp2rage_path) as f:
-            params = yaml.safe_load(f)
+            params = yaml.load(f, Loader=_YAML_LOADER)
         required = ["RepetitionTimeExcitation", "RepetitionTimePreparation",
                     "InversionTime", "NumberShots", "FlipAngle"]
         missing = [k for k in required if k not in params]
         if missing:
-            logger.error(f"mp2rage.yaml missing: {missing}")
+            logger.error("mp2rage.yaml missing: %s", missing)
             return None
         for key in ["InversionTime", "FlipAngle"]:
             if not isinstance(params[key], list) or len(params[key]) != 2:
-                logger.error(f"mp2rage.yaml: '{key}' must be [inv1, inv2]")
+                logger.error("mp2rage.yaml: '%s' must be [inv1, inv2]", key)
                 return None
-        return params
+        _MP2RAGE_CACHE[cache_key] = params
+        return dict(params)
     except Exception as e:
-        logger.error(f"Error loading mp2rage.yaml: {e}")
+        logger.error("Error loading mp2rage.yaml: %s", e)
         return None
 
 
@@ -546,18 +767,16 @@ def detect_sessions(studydir: Path, subject: str) -> List[Optional[str]]:
         
         if ses_dirs:
             sessions = [d.name.replace("ses-", "") for d in ses_dirs]
-            logger.info(
-                f"Detected {len(sessions)} session(s) for {sub_prefix} "
-                f"in {data_root}/: {sessions}"
-            )
+            logger.info("Detected %d session(s) for %s in %s/: %s",
+                        len(sessions), sub_prefix, data_root, sessions)
             return sessions
         
         # no ses-* dirs but directory has content — single session
         contents = [d for d in subject_dir.iterdir() if d.is_dir() and not d.name.startswith(".")]
         if contents:
-            logger.info(f"Single-session layout detected for {sub_prefix} in {data_root}/")
+            logger.info("Single-session layout detected for %s in %s/", sub_prefix, data_root)
             return [None]
     
     # nothing found — return [None] and let the command fail with a clear error
-    logger.debug(f"No sourcedata or rawdata found for {sub_prefix}")
+    logger.debug("No sourcedata or rawdata found for %s", sub_prefix)
     return [None]
\ No newline at end of file
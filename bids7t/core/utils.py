@@ -1,9 +1,15 @@
 """Shared utility functions for bids7t commands."""
 
+import fnmatch
 import logging
+import os
+import shlex
+import shutil
 import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional, List, Tuple
+from typing import Callable, Iterable, Optional, List, Tuple
 import sys
 
 
@@ -28,11 +34,16 @@ def setup_logging(name: str, log_file: Optional[Path] = None, verbose: bool = Fa
 
 def run_command(cmd: List[str], logger, log_file: Optional[Path] = None,
                 capture_output: bool = False, check: bool = True):
-    logger.debug(f"Running: {' '.join(cmd)}")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Running: %s", shlex.join(cmd))
     if log_file:
         log_file.parent.mkdir(parents=True, exist_ok=True)
-        with open(log_file, "w") as lf:
-            result = subprocess.run(cmd, stdout=lf, stderr=subprocess.STDOUT, text=True)
+        # the child writes straight to the fd; no Python file object needed
+        fd = os.open(log_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            result = subprocess.run(cmd, stdout=fd, stderr=subprocess.STDOUT)
+        finally:
+            os.close(fd)
     elif capture_output:
         result = subprocess.run(cmd, capture_output=True, text=True)
     else:
@@ -45,7 +56,8 @@ def run_command(cmd: List[str], logger, log_file: Optional[Path] = None,
     return result
 
 
-def check_outputs_exist(output_files: List[Path], logger, force: bool = False) -> Tuple[bool, List[Path]]:
+def check_outputs_exist(output_files: Iterable[Path], logger, force: bool = False) -> Tuple[bool, List[Path]]:
+    # accepts any iterable (e.g. a generator of candidate paths), consumed once
     existing = [f for f in output_files if f.exists()]
     if existing and not force:
         logger.info(f"{len(existing)} output file(s) already exist. Run with --force to overwrite")
@@ -55,14 +67,133 @@ def check_outputs_exist(output_files: List[Path], logger, force: bool = False) -
     return True, existing
 
 
-def find_files(directory: Path, pattern: str, recursive: bool = False) -> List[Path]:
-    if not directory.exists():
-        return []
+def find_files(directory: Path, pattern: str, recursive: bool = False,
+               sort: bool = False) -> List[Path]:
+    # fnmatch over plain names from listdir/walk; Path objects are only built
+    # for matches. unordered unless sort=True (callers mostly just iterate)
+    directory = Path(directory)
     if recursive:
-        return sorted(directory.rglob(pattern))
-    return sorted(directory.glob(pattern))
+        found = [
+            Path(root, name)
+            for root, dirs, files in os.walk(directory)
+            for name in fnmatch.filter(dirs + files, pattern)
+        ]
+    else:
+        try:
+            names = os.listdir(directory)
+        except (FileNotFoundError, NotADirectoryError):
+            return []
+        found = [directory / name for name in fnmatch.filter(names, pattern)]
+    if sort:
+        found.sort()
+    return found
+
+
+# default cap on run_parallel workers: the pooled jobs (nibabel volume loads,
+# slicetimer, pigz) are memory-heavy or already multi-threaded themselves
+DEFAULT_MAX_WORKERS = 4
+
+
+# per-thread CPU budget. run_parallel hands each worker an equal share of the
+# caller's budget, so nested pools and pigz don't multiply up to cpu_count**2
+_CPU_BUDGET = threading.local()
+
+
+def cpu_budget() -> int:
+    # threads the current thread may use: its run_parallel share, or all CPUs
+    return getattr(_CPU_BUDGET, "cpus", None) or (os.cpu_count() or 1)
+
+
+def run_parallel(func: Callable, items: Iterable, max_workers: Optional[int] = None) -> list:
+    # func over items on a bounded thread pool, results in input order;
+    # runs inline when there's only one worker's worth of work
+    items = list(items)
+    budget = cpu_budget()
+    n_workers = min(len(items), max_workers or DEFAULT_MAX_WORKERS, budget)
+    if n_workers <= 1:
+        return [func(item) for item in items]
+    share = max(1, budget // n_workers)
+
+    def call(item):
+        _CPU_BUDGET.cpus = share
+        return func(item)
+
+    with ThreadPoolExecutor(max_workers=n_workers) as pool:
+        return list(pool.map(call, items))
+
+
+def json_sidecar(path: Path) -> Path:
+    # x.nii.gz / x.nii -> x.json by slicing the name (one Path built, no re-parse)
+    path = Path(path)
+    name = path.name
+    if name.endswith(".nii.gz"):
+        return path.with_name(name[:-7] + ".json")
+    if name.endswith(".nii"):
+        return path.with_name(name[:-4] + ".json")
+    return path.with_suffix(".json")
+
+
+def is_nonempty_dir(directory: Path) -> bool:
+    # True if directory exists and has at least one entry; stops at the first
+    try:
+        with os.scandir(directory) as it:
+            return next(it, None) is not None
+    except (FileNotFoundError, NotADirectoryError):
+        return False
 
 
 def get_docker_user_args() -> List[str]:
-    import os
-    return ["--user", f"{os.getuid()}:{os.getgid()}"]
\ No newline at end of file
+    return ["--user", f"{os.getuid()}:{os.getgid()}"]
+
+
+# images known to be present locally, so repeat calls skip `docker image inspect`
+_DOCKER_IMAGES_PRESENT = set()
+
+
+def ensure_docker_image(image: str, logger) -> None:
+    # pull once if missing; callers then run with --pull=never (no registry round-trip)
+    if image in _DOCKER_IMAGES_PRESENT:
+        return
+    inspect = subprocess.run(["docker", "image", "inspect", image],
+                             stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    if inspect.returncode != 0:
+        logger.info(f"Pulling docker image {image}")
+        run_command(["docker", "pull", image], logger, capture_output=True)
+    _DOCKER_IMAGES_PRESENT.add(image)
+
+
+def save_nifti(img, path: Path, threads: Optional[int] = None) -> None:
+    """
+    Save a NIfTI image, using pigz for .nii.gz when it is on PATH.
+
+    nibabel compresses with single-threaded zlib, which dominates write
+    time for large 7T volumes. With pigz available the image is written
+    uncompressed to a temp file next to ``path`` and compressed in
+    parallel; otherwise (or if pigz fails) this is plain ``nib.save``.
+    pigz uses ``threads`` compression threads, by default the calling
+    thread's ``cpu_budget()`` (its share when inside ``run_parallel``).
+    """
+    import nibabel as nib
+
+    path = Path(path)
+    pigz = shutil.which("pigz") if path.name.endswith(".nii.gz") else None
+    if pigz is None:
+        nib.save(img, path)
+        return
+
+    tmp = path.with_name(f".{path.name[:-7]}.{os.getpid()}.{threading.get_ident()}.nii")
+    tmp_gz = tmp.with_name(tmp.name + ".gz")
+    try:
+        nib.save(img, tmp)
+        result = subprocess.run(
+            [pigz, "-n", "-f", "-p", str(threads or cpu_budget()), str(tmp)],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        if result.returncode == 0:
+            os.replace(tmp_gz, path)
+            return
+    finally:
+        for leftover in (tmp, tmp_gz):
+            if leftover.exists():
+                leftover.unlink()
+    nib.save(img, path)